@@ -1,11 +1,17 @@
 CONFIG = {
     # "orders": {
-    #     "watch_directory": "../../src/landing/orders",
+    #     "watch_directory": "landing/orders",
     #     "is_daemon": True,
+    #     "workers": 2,
+    #     "batch_window_ms": 100,
+    #     "max_batch_files": 64,
     # }
     # ,
     "customers": {
-        "watch_directory": "../../src/landing/customers",
+        "watch_directory": "landing/customers",
         "is_daemon": True,
+        "workers": 2,
+        "batch_window_ms": 100,
+        "max_batch_files": 64,
     }
 }
\ No newline at end of file
@@ -1,8 +1,91 @@
-"""Pytest configuration file to set up the Python path for tests."""
+"""Pytest configuration file to set up the Python path and shared fixtures for tests."""
+import logging
 import sys
 from pathlib import Path
+import psycopg2
+import pytest
+from sqlalchemy import URL, create_engine
+from testcontainers.postgres import PostgresContainer
 
 # Add the src directory to Python path so tests can import modules
 src_dir = Path(__file__).parent
 if str(src_dir) not in sys.path:
     sys.path.insert(0, str(src_dir))
+
+
+# Fixtures that need the Postgres container; tests using any of them are marked as integration tests
+INTEGRATION_FIXTURES = {"postgres_container", "db_config", "db_instance"}
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: test runs against a Postgres container")
+
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        if INTEGRATION_FIXTURES.intersection(item.fixturenames):
+            item.add_marker(pytest.mark.integration)
+
+
+# Starting the container dominates test wall time, so one is shared by the whole session
+@pytest.fixture(scope="session")
+def postgres_container(request):
+    # Trust auth skips the SCRAM exchange on every new connection, and the test data is
+    # disposable, so durability is traded for faster writes
+    container = (
+        PostgresContainer("postgres:16-alpine")
+        .with_env("POSTGRES_HOST_AUTH_METHOD", "trust")
+        .with_command("postgres -c fsync=off -c synchronous_commit=off -c full_page_writes=off")
+    )
+    container.start()
+
+    def cleanup():
+        container.stop()
+
+    request.addfinalizer(cleanup)
+    return container
+
+
+@pytest.fixture
+def db_config(postgres_container):
+    return {
+        "dbname": postgres_container.dbname,
+        "user": postgres_container.username,
+        "password": postgres_container.password,
+        "host": postgres_container.get_container_host_ip(),
+        "port": int(postgres_container.get_exposed_port(5432)),
+    }
+
+
+@pytest.fixture
+def logger():
+    """Real logger that discards its records; unlike a MagicMock it records nothing per call."""
+    logger = logging.getLogger("test")
+    logger.handlers = [logging.NullHandler()]
+    logger.propagate = False
+    return logger
+
+
+@pytest.fixture
+def engine(db_config):
+    """SQLAlchemy engine on the test container, used for DDL like in `main.configure_database`."""
+    engine = create_engine(
+        URL.create(
+            "postgresql+psycopg2",
+            username=db_config["user"],
+            password=db_config["password"],
+            host=db_config["host"],
+            port=db_config["port"],
+            database=db_config["dbname"]
+        )
+    )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_conn(db_config):
+    """Plain psycopg2 connection to the test container, outside of any pool."""
+    conn = psycopg2.connect(**db_config)
+    yield conn
+    conn.close()
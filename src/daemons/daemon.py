@@ -1,9 +1,9 @@
 from logging import Logger
-from watchdog.observers import Observer
+from typing import Optional
+from watchdog.events import FileCreatedEvent
+from watchdog.observers.api import BaseObserver
 from event_handlers.data_event_handler import DataEventHandler
 from processors.processor_interface import IProcessor
-import os
-import time
 
 # from db.postgres_db import PostgresDB
 from db.database_interface import IDatabase
@@ -14,20 +14,39 @@ class Daemon():
     A daemon that watches a directory for new raw files.
 
     It processes files using a generic IProcessor, inserting data into a database and handling
-    any necessary database interactions.
+    any necessary database interactions. The Observer is shared with other daemons and owned
+    by the DaemonFactory, which is responsible for starting and stopping it.
+
+    The watch is non-recursive and only file creation events are dispatched, so `watch_directory`
+    should be a dedicated leaf directory that receives nothing but finished CSV files. Producers
+    must write to a sibling directory and atomically rename the file into the watched directory;
+    a file written in place would be picked up as soon as it is created, before it is complete.
+
+    `stop()` stops the daemon's event handler once the Observer no longer dispatches events to it.
     """
-    def __init__(self, watch_directory: str, is_daemon: bool, logger: Logger) -> None:
-        self.observer = Observer()
+    def __init__(self,
+                 watch_directory: str,
+                 is_daemon: bool,
+                 observer: BaseObserver,
+                 logger: Logger,
+                 workers: int = 1,
+                 batch_window_ms: int = 500,
+                 max_batch_files: int = 64) -> None:
+        self.observer = observer
         self.watch_directory = watch_directory
         self.is_daemon = is_daemon
         self.logger = logger
+        self.workers = workers
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_files = max_batch_files
+        self.event_handler: Optional[DataEventHandler] = None
 
     def run(self, processor: IProcessor, db_conn: IDatabase) -> None:
         """
-        Starts the PostgresDaemon to monitor the directory and process files.
+        Registers the daemon's watch directory on the shared Observer.
 
-        This method sets up the necessary tables, creates a generic DataEventHandler, and starts the
-        Observer to watch the specified directory. When a new file is detected,
+        This method sets up the necessary tables, creates a generic DataEventHandler and schedules
+        it on the Observer for the specified directory. When a new file is detected,
         it is processed using the provided IProcessor.
 
         Args:
@@ -36,17 +55,28 @@ class Daemon():
         """
         self.logger.info("Running Daemon...")
         processor.set_up_tables()
-        event_handler = DataEventHandler(processor, db_conn, ['*.csv'], self.logger)
-
-        self.observer.daemon = self.is_daemon
-        watch_path = os.path.abspath(os.path.join(os.path.dirname(__file__), self.watch_directory))
-        self.logger.info(f"Watching: {watch_path}")
-        self.observer.schedule(event_handler=event_handler, path=watch_path, recursive=True)
-        self.observer.start()
-        try:
-            while True:
-                time.sleep(600)
-        except KeyboardInterrupt:
-            self.observer.stop()
-        finally:
-            self.observer.join()
+        self.event_handler = DataEventHandler(processor,
+                                              db_conn,
+                                              ['*.csv'],
+                                              self.logger,
+                                              batch_window=self.batch_window_ms / 1000,
+                                              workers=self.workers,
+                                              max_batch_files=self.max_batch_files,
+                                              watch_directory=self.watch_directory)
+
+        if not self.observer.is_alive():
+            self.observer.daemon = self.is_daemon
+        self.logger.info("Watching: %s", self.watch_directory)
+        self.observer.schedule(
+            event_handler=self.event_handler,
+            path=self.watch_directory,
+            recursive=False,
+            event_filter=[FileCreatedEvent]
+        )
+
+    def stop(self) -> None:
+        """
+        Stops the daemon's event handler after it has processed the files already queued.
+        """
+        if self.event_handler is not None:
+            self.event_handler.stop()
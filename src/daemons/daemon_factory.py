@@ -0,0 +1,85 @@
+from logging import Logger
+from pathlib import Path
+from threading import Event
+from typing import List, Optional
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+from daemons.daemon import Daemon
+import signal
+
+
+class DaemonFactory:
+    """
+    Factory for creating daemons that share a single watchdog Observer.
+
+    Each daemon only schedules a watch on the shared Observer rather than creating its own,
+    so the process holds one observer regardless of how many entity types are configured.
+    The factory owns the Observer lifecycle: `run()` starts it and blocks until `stop()` is
+    called or SIGINT/SIGTERM is received, then stops the daemons it created so files already
+    queued are processed before it returns.
+
+    By default the platform's native watchdog Observer is used (inotify on Linux, which reads
+    queued events in batches rather than one syscall per event). Another BaseObserver
+    implementation can be supplied instead.
+
+    Args:
+        logger: Logger for tracking daemon lifecycle events
+        observer: Observer to share between daemons, defaults to the platform Observer
+    """
+    def __init__(self, logger: Logger, observer: Optional[BaseObserver] = None) -> None:
+        self.logger = logger
+        self._observer = observer if observer is not None else Observer()
+        self._stop = Event()
+        self._daemons: List[Daemon] = []
+
+    def get_daemon(self,
+                   watch_directory: str,
+                   is_daemon: bool,
+                   workers: int = 1,
+                   batch_window_ms: int = 500,
+                   max_batch_files: int = 64) -> Daemon:
+        """
+        Creates a daemon bound to the shared Observer.
+
+        The watch directory is resolved to an absolute path once, here; relative paths are
+        resolved against the current working directory and `~` is expanded.
+
+        Args:
+            watch_directory: Directory the daemon should watch for new files
+            is_daemon: Whether the Observer thread should run as a daemon thread
+            workers: Number of threads processing the daemon's files in parallel
+            batch_window_ms: Milliseconds to wait after a file arrives for more files to batch with it
+            max_batch_files: Maximum number of files processed together as one batch
+        """
+        watch_path = Path(watch_directory).expanduser().resolve()
+        daemon = Daemon(str(watch_path), is_daemon, self._observer, self.logger,
+                        workers, batch_window_ms, max_batch_files)
+        self._daemons.append(daemon)
+        return daemon
+
+    def run(self) -> None:
+        """
+        Starts the shared Observer and blocks until the factory is stopped.
+
+        The Observer is stopped first, so no more files are queued, then each daemon's workers
+        finish the files already queued and release their connections.
+        """
+        self.logger.info("Starting %s", type(self._observer).__name__)
+        self._observer.start()
+
+        signal.signal(signal.SIGINT, lambda *_: self.stop())
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        try:
+            self._stop.wait()
+        finally:
+            self.logger.info("Stopping Daemons...")
+            self._observer.stop()
+            self._observer.join()
+            for daemon in self._daemons:
+                daemon.stop()
+
+    def stop(self) -> None:
+        """
+        Signals `run()` to stop the shared Observer and return.
+        """
+        self._stop.set()
@@ -0,0 +1,86 @@
+from io import BytesIO
+from typing import Iterable, Optional, BinaryIO
+import mmap
+import os
+
+# Bytes requested from the input per read() call during COPY ... FROM STDIN. psycopg2 frames
+# each chunk into CopyData messages itself and only accepts bytes or str from read(), so the
+# file cannot be sendfile()'d to the socket or handed over as a memoryview; large chunks keep
+# the number of Python-level copies per file low instead. 4 MiB matches the read sizes at which
+# sequential reads from NVMe storage reach full throughput.
+COPY_CHUNK_SIZE = 4 << 20
+
+
+def open_for_copy(csv_file: str) -> BinaryIO:
+    """
+    Opens a file as a read-only memory map for streaming into COPY ... FROM STDIN.
+
+    Reads are served straight from the page cache instead of through Python's buffered file
+    layer, and the kernel is advised that the file will be read sequentially so it can read
+    ahead aggressively. Empty files, which cannot be mapped, are returned as an empty stream.
+    """
+    with open(csv_file, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return BytesIO()
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapped, "madvise"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
+
+
+class ChainedCSVReader:
+    """
+    File-like object that streams several CSV files as a single COPY input.
+
+    The header line of the first non-empty file is passed through (so `COPY ... CSV HEADER` skips
+    it), while the header lines of every following file are dropped. A newline is inserted between
+    files that do not end with one, so the last row of one file never runs into the next.
+
+    Args:
+        csv_files: Paths of the CSV files to stream, in order
+    """
+    def __init__(self, csv_files: Iterable[str]) -> None:
+        self._csv_files = iter(csv_files)
+        self._current: Optional[BinaryIO] = None
+        self._is_first = True
+        self._ends_with_newline = True
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Returns up to `size` bytes from the current file, moving on to the next file when exhausted.
+        """
+        while True:
+            if self._current is None:
+                csv_file = next(self._csv_files, None)
+                if csv_file is None:
+                    return b""
+                self._current = open_for_copy(csv_file)
+                # Empty files leading the stream have passed no header through yet
+                if not self._is_first:
+                    self._current.readline()
+                if not self._ends_with_newline:
+                    self._ends_with_newline = True
+                    return b"\n"
+
+            chunk = self._current.read(size)
+            if chunk:
+                self._is_first = False
+                self._ends_with_newline = chunk.endswith(b"\n")
+                return chunk
+
+            self._current.close()
+            self._current = None
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+    def __enter__(self) -> "ChainedCSVReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.close()
+        return False
@@ -33,7 +33,7 @@ class IDatabaseManager(ABC):
         pass
 
     @abstractmethod
-    def execute_write(self, query_type: QueryType, conn: connection, params: Optional[tuple]):
+    def execute_write(self, query_type: QueryType, conn: connection, params: Optional[tuple], commit: bool = True):
         """
         Performs select operation on provided table entity.
         """
@@ -14,6 +14,8 @@ class ManagedConnection:
         return self.conn
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
-        if self.conn:
-            self.db.release_connection(self.conn)
+        # Clear the connection before releasing it so a repeated exit cannot release it twice
+        conn, self.conn = self.conn, None
+        if conn:
+            self.db.release_connection(conn)
         return False
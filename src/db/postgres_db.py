@@ -1,10 +1,9 @@
-from logging import Logger
+from logging import DEBUG, Logger
 from typing import Optional
 from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extensions import connection
 from threading import Lock, Semaphore
 from db.database_interface import IDatabase
-from db.db_context_manager import ManagedConnection
 
 
 class PostgresDB(IDatabase):
@@ -13,7 +12,8 @@ class PostgresDB(IDatabase):
 
     This class uses psycopg2's ThreadedConnectionPool to manage database connections efficiently.
     A semaphore enforces a maximum number of concurrent connections, preventing connection starvation
-    when multiple threads request connections simultaneously.
+    when multiple threads request connections simultaneously. TCP keepalives are enabled so that
+    connections idling in the pool are not silently dropped by firewalls or NAT between ingestions.
     """
     _instance: Optional["PostgresDB"] = None
     _lock: Lock = Lock()
@@ -71,7 +71,11 @@ class PostgresDB(IDatabase):
             user=user,
             password=password,
             host=host,
-            port=port
+            port=port,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=5
         )
         self._initialized: bool = True
 
@@ -92,23 +96,32 @@ class PostgresDB(IDatabase):
             raise ValueError("PostgresDB not initialized. Create an instance first.")
         return cls._instance
 
-    def get_connection(self) -> ManagedConnection:
+    def get_connection(self) -> connection:
         """
         Acquire a connection from the pool. Blocks if max concurrent connections are in use.
 
+        The semaphore is what makes callers wait: ThreadedConnectionPool itself raises
+        PoolError instead of blocking once `max_conn` connections are checked out.
+
         Returns:
             connection: A psycopg2 connection object.
 
         Raises:
-            ConnectionError: If the pool is not initialized.
+            ConnectionError: If the pool is not initialized, or is closed while waiting.
         """
-        self.logger.info("Fetching Connection")
+        if self.logger.isEnabledFor(DEBUG):
+            self.logger.debug("Fetching Connection")
         if not self._pool:
             raise ConnectionError("Pool not initialised.")
 
         self._semaphore.acquire()
+        # The pool may have been closed while this thread was waiting for a permit
+        pool = self._pool
+        if not pool:
+            self._semaphore.release()
+            raise ConnectionError("Pool not initialised.")
         try:
-            return self._pool.getconn()
+            return pool.getconn()
         except Exception:
             self._semaphore.release()
             raise
@@ -117,17 +130,19 @@ class PostgresDB(IDatabase):
         """
         Release a connection back to the pool and free a semaphore permit.
 
+        The permit is freed even if the pool has since been closed, so no waiter is left blocked.
+
         Args:
             conn: The connection object to release.
         """
-        self.logger.info("Releasing Connection")
-        if self._pool:
-            try:
-                self._pool.putconn(conn)
-            except Exception:
-                raise
-            finally:
-                self._semaphore.release()
+        if self.logger.isEnabledFor(DEBUG):
+            self.logger.debug("Releasing Connection")
+        pool = self._pool
+        try:
+            if pool:
+                pool.putconn(conn)
+        finally:
+            self._semaphore.release()
 
     def close_pool(self) -> None:
         """
@@ -1,14 +1,43 @@
-from logging import Logger
+from logging import DEBUG, Logger
 from sqlite3 import Connection
-from typing import Optional
-import psycopg2
-import psycopg2.extras
-from sqlalchemy import Engine, MetaData
-from sqlalchemy.dialects import postgresql
-from psycopg2.extras import DictCursor
+from threading import Lock
+from typing import Any, Optional, Union
+from weakref import WeakKeyDictionary
+from sqlalchemy import Engine, MetaData, Table, text
+from psycopg2.extras import RealDictCursor, execute_values
 
+from db.copy_streams import COPY_CHUNK_SIZE, ChainedCSVReader
 from db.database_manager_interface import IDatabaseManager
-from db.query_types import QueryResult, QueryType
+from db.query_types import PreparedStatement, QueryResult, QueryReturnType, QueryType
+
+# Result fetchers for each read return type
+_FETCHERS = {
+    QueryReturnType.SCALAR: lambda curr: (curr.fetchone() or [None])[0],
+    QueryReturnType.ONE: lambda curr: curr.fetchone() or [],
+    QueryReturnType.ALL: lambda curr: curr.fetchall() or [],
+}
+
+# COPY ... FROM STDIN statement for each table, built on first use
+_COPY_SQL_CACHE: WeakKeyDictionary = WeakKeyDictionary()
+
+# Names of the statements prepared on each connection; entries go with the connection. Prepared
+# statements belong to the connection rather than to a manager, so the record is shared by every
+# manager that the connection passes through.
+_PREPARED: WeakKeyDictionary = WeakKeyDictionary()
+_PREPARED_LOCK: Lock = Lock()
+
+
+def _copy_sql(table: Table) -> str:
+    """
+    Returns the CSV COPY statement for a table, covering the columns without a server default.
+    """
+    copy_from = _COPY_SQL_CACHE.get(table)
+    if copy_from is None:
+        copy_columns = [col.name for col in table.columns if col.server_default is None]
+        columns_str = ", ".join(copy_columns)
+        copy_from = f"COPY {table}({columns_str}) FROM STDIN WITH CSV HEADER NULL AS 'NULL';"
+        _COPY_SQL_CACHE[table] = copy_from
+    return copy_from
 
 
 class PostgresManager(IDatabaseManager):
@@ -16,6 +45,33 @@ class PostgresManager(IDatabaseManager):
         self.engine: Engine = engine
         self.logger: Logger = logger
 
+    def _execute(self, curr, query_type: QueryType, conn: Connection, params: Optional[dict]) -> None:
+        """
+        Executes a query on the cursor.
+
+        Queries without params run as literal SQL. Queries with params run as server-side
+        prepared statements, prepared once per connection so repeat executions skip parsing
+        and planning.
+        """
+        if params is None:
+            curr.execute(query_type.raw_sql)
+            return
+
+        statement = self._prepare(curr, query_type, conn)
+        curr.execute(statement.execute_sql, statement.bind(params))
+
+    def _prepare(self, curr, query_type: QueryType, conn: Connection) -> PreparedStatement:
+        """
+        Prepares the query's statement on the connection unless it has been prepared there already.
+        """
+        statement: PreparedStatement = query_type.prepared
+        with _PREPARED_LOCK:
+            prepared = _PREPARED.setdefault(conn, set())
+        if statement.name not in prepared:
+            curr.execute(statement.prepare_sql)
+            prepared.add(statement.name)
+        return statement
+
     def drop_table(self, table_metadata: MetaData):
         """
         Drops tables referenced in the table metadata passed.
@@ -29,83 +85,194 @@ class PostgresManager(IDatabaseManager):
         """
         self.logger.info("Creating tables")
         table_metadata.create_all(bind=self.engine)
+
+    def truncate_table(self, table_metadata: MetaData):
+        """
+        Empties tables referenced in the table metadata passed with a single TRUNCATE.
+        """
+        self.logger.info("Truncating tables")
+        preparer = self.engine.dialect.identifier_preparer
+        table_names = ", ".join(preparer.format_table(table) for table in table_metadata.sorted_tables)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE TABLE {table_names}"))
     
-    def execute_csv_copy(self, table_name, csv_file, conn: Connection):
+    def set_unlogged(self, table_metadata: MetaData):
         """
-        Bulk inserts data into a table from a CSV file.
+        Converts tables referenced in the table metadata passed to UNLOGGED if they are still logged.
+
+        `create_table` leaves existing tables as they are, so tables created before they were
+        declared UNLOGGED would otherwise stay logged. The conversion rewrites the table, so it
+        is only issued for tables that are still logged. Requires PostgreSQL 9.5 or later.
         """
-        copy_columns = [col.name for col in table_name.columns if col.server_default is None]
-        columns_str = ", ".join(copy_columns)
-        with conn.cursor() as curr:
-            copy_from = f"COPY {table_name}({columns_str}) FROM STDIN WITH CSV HEADER NULL AS 'NULL';"
-            with open(csv_file, 'r') as file:
-                try:
-                    curr.copy_expert(copy_from, file)
-                except Exception:
-                    # TODO if exception here prevent process from proceeding (TRY/CATCH)
-                    self.logger.error("Copy CSV Error Occurred:", exc_info=True)
+        preparer = self.engine.dialect.identifier_preparer
+        with self.engine.begin() as conn:
+            for table in table_metadata.sorted_tables:
+                table_name = preparer.format_table(table)
+                persistence = conn.execute(
+                    text("SELECT relpersistence FROM pg_class WHERE oid = to_regclass(:table_name)"),
+                    {"table_name": table_name}
+                ).scalar()
+                if persistence == "p":
+                    self.logger.info("Setting %s UNLOGGED", table_name)
+                    conn.execute(text(f"ALTER TABLE {table_name} SET UNLOGGED"))
+
+    def execute_csv_copy_many(self, table_name, csv_files: list[str], conn: Connection, commit: bool = True) -> int:
+        """
+        Bulk inserts data into a table from several CSV files using a single COPY and commit.
+
+        The files are chained into one COPY ... FROM STDIN stream, so the per-statement parse and
+        commit overhead is paid once per batch rather than once per file. If the COPY fails the
+        transaction is rolled back and the error is re-raised, leaving none of the files loaded.
+        With `commit=False` the caller is responsible for committing the transaction.
+
+        Returns:
+            Number of rows copied, as reported by the server for the COPY
+        """
+        copy_from = _copy_sql(table_name)
+        with conn.cursor() as curr, ChainedCSVReader(csv_files) as stream:
+            try:
+                curr.copy_expert(copy_from, stream, size=COPY_CHUNK_SIZE)
+            except Exception:
+                self.logger.error("Copy CSV Error Occurred:", exc_info=True)
+                conn.rollback()
+                raise
+            copied = curr.rowcount
+        if commit:
             conn.commit()
+        return copied
 
     def execute_write(
         self,
         query_type: QueryType,
         conn: Connection,
-        params: Optional[tuple] = None
+        params: Optional[dict] = None,
+        commit: bool = True
     ) -> None:
-        self.logger.info(f"Running query: {query_type.name} | SQL: {query_type.sql}")
+        """
+        Executes a write query and commits it.
+
+        With `commit=False` the query is left in the open transaction so that several writes can
+        be committed together by the caller. Failed queries are rolled back and re-raised.
+
+        Bulk insert query types with a sequence of row tuples as `params` are sent with
+        `execute_values`, which packs up to 10,000 rows into each INSERT statement instead
+        of executing one statement per row. Other queries with a dict of `params` run as
+        prepared statements.
+        """
+        if query_type.is_bulk_insert and params:
+            self.logger.info("Running query: %s", query_type.name)
+            self.logger.debug("SQL: %s", query_type.values_template)
+            with conn.cursor() as curr:
+                try:
+                    execute_values(curr, query_type.values_template, params, page_size=10_000)
+                    if commit:
+                        conn.commit()
+                    self.logger.info("Rows Inserted: %s", len(params))
+                except Exception:
+                    self.logger.error("Error Occurred:", exc_info=True)
+                    self.logger.info("Rolling back transaction")
+                    conn.rollback()
+                    self.logger.info("Transaction rolled back")
+                    raise
+            return
 
         try:
-            raw_sql = query_type.sql.compile(
-                            dialect=postgresql.dialect(),
-                            compile_kwargs={"literal_binds": True}
-                        ).string
+            raw_sql = query_type.raw_sql if params is None else query_type.param_sql
         except Exception:
             self.logger.error("Compilation Error Occurred:", exc_info=True)
+            raise
+        # The SQL of a multi-row insert renders every row, so it is only logged at DEBUG
+        self.logger.info("Running query: %s", query_type.name)
+        self.logger.debug("SQL: %s", raw_sql)
+
+        with conn.cursor() as curr:
+            try:
+                self._execute(curr, query_type, conn, params)
+                if commit:
+                    conn.commit()
+                self.logger.info("Rows Inserted: %s", curr.rowcount)
+            except Exception:
+                self.logger.error("Error Occurred:", exc_info=True)
+                self.logger.info("Rolling back transaction")
+                conn.rollback()
+                self.logger.info("Transaction rolled back")
+                raise
+
+    def execute_write_many(
+        self,
+        queries: list[tuple[QueryType, Optional[dict]]],
+        conn: Connection,
+        commit: bool = True
+    ) -> None:
+        """
+        Executes several write queries in a single round trip and commits them.
 
-        with conn.cursor(cursor_factory=DictCursor) as curr:
+        The queries are rendered client-side, the ones with params as EXECUTEs of their prepared
+        statements, and sent to the server as one multi-statement string, so N writes cost one
+        network round trip instead of N. Failed queries are rolled back and re-raised.
+
+        Args:
+            queries: Query types to run in order, each with its params or None
+            conn: Active database connection
+            commit: Whether to commit once all queries have run
+        """
+        with conn.cursor() as curr:
             try:
-                curr.execute(raw_sql, params)
-                conn.commit()
-                self.logger.info(f"Rows Inserted: {curr.rowcount}")
+                statements = []
+                for query_type, params in queries:
+                    if params is None:
+                        statements.append(query_type.raw_sql.encode())
+                    else:
+                        statement = self._prepare(curr, query_type, conn)
+                        statements.append(curr.mogrify(statement.execute_sql, statement.bind(params)))
+                self.logger.info("Running queries: %s", ', '.join(query_type.name for query_type, _ in queries))
+                curr.execute(b";\n".join(statements))
+                if commit:
+                    conn.commit()
             except Exception:
                 self.logger.error("Error Occurred:", exc_info=True)
                 self.logger.info("Rolling back transaction")
                 conn.rollback()
                 self.logger.info("Transaction rolled back")
+                raise
 
     def execute_read(
         self,
         query_type: QueryType,
         conn: Connection,
-        params: Optional[tuple] = None
-    ) -> QueryResult:
-        self.logger.info(f"Running query: {query_type.name} | SQL: {query_type.sql}")
+        params: Optional[dict] = None
+    ) -> Union[QueryResult, Any]:
+        """
+        Executes a read query and returns its result according to the query's return type.
 
+        ALL queries return a list of dicts, one per row, and ONE queries return the first row as a
+        tuple; both return an empty list if there are no rows. SCALAR queries return the first
+        column of the first row, or None. Only ALL queries pay for mapping rows to column names.
+
+        If the query fails, the error is logged, the transaction is rolled back so the connection
+        stays usable, and the exception is re-raised.
+        """
         try:
-            raw_sql = query_type.sql.compile(
-                            dialect=postgresql.dialect(),
-                            compile_kwargs={"literal_binds": True}
-                        ).string
+            raw_sql = query_type.raw_sql if params is None else query_type.param_sql
         except Exception:
             self.logger.error("Compilation Error Occurred:", exc_info=True)
+            raise
+        if self.logger.isEnabledFor(DEBUG):
+            self.logger.debug("Running query: %s | SQL: %s", query_type.name, raw_sql)
 
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as curr:
+        cursor_factory = RealDictCursor if query_type.return_type is QueryReturnType.ALL else None
+        with conn.cursor(cursor_factory=cursor_factory) as curr:
             try:
-                self.logger.info(f"Executing: {raw_sql}")
-                curr.execute(raw_sql, params)
-
-                if query_type.return_type.value == "scalar":
-                    result = curr.fetchone()
-
-                elif query_type.return_type.value == "one":
-                    result = curr.fetchone()
+                self._execute(curr, query_type, conn, params)
 
-                elif query_type.return_type.value == "all":
-                    result = curr.fetchall()
-                else:
+                fetch = _FETCHERS.get(query_type.return_type)
+                if fetch is None:
                     raise ValueError(f"Unknown return_type: {query_type.return_type}")
-
+                result = fetch(curr)
             except Exception:
                 self.logger.error("Error Occurred:", exc_info=True)
+                self.logger.info("Rolling back transaction")
+                conn.rollback()
+                raise
 
-        return result if result else []
+        return result
@@ -1,6 +1,10 @@
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List
+from functools import cached_property
+from hashlib import sha1
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import NullType
 
 QueryResult = List[Dict[str, Any]]
 
@@ -12,8 +16,84 @@ class QueryReturnType(Enum):
     NONE = None
 
 
+@dataclass(frozen=True)
+class PreparedStatement:
+    """
+    A server-side prepared statement compiled from a QueryType.
+
+    Attributes:
+        name: Statement name, derived from the SQL text so identical statements share a name.
+        prepare_sql: PREPARE statement to run once per connection.
+        execute_sql: EXECUTE statement with one pyformat placeholder per parameter.
+        param_names: Bind parameter names in positional order.
+        defaults: Values of bind parameters that were given a value when the statement was built.
+    """
+    name: str
+    prepare_sql: str
+    execute_sql: str
+    param_names: Tuple[str, ...]
+    defaults: Dict[str, Any]
+
+    def bind(self, params: Dict[str, Any]) -> Tuple[Any, ...]:
+        """
+        Orders the given params, falling back to the statement defaults, for use with `execute_sql`.
+        """
+        return tuple(params.get(name, self.defaults.get(name)) for name in self.param_names)
+
+
 @dataclass(frozen=True)
 class QueryType:
     name: str
     sql: str
     return_type: QueryReturnType
+    # Bulk inserts are sent with psycopg2's execute_values; values_template is the
+    # INSERT statement with a single `VALUES %s` placeholder for the rows.
+    is_bulk_insert: bool = False
+    values_template: Optional[str] = None
+
+    @cached_property
+    def raw_sql(self) -> str:
+        """
+        SQL text with bound values rendered inline, compiled once per QueryType.
+        """
+        return self.sql.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True}
+        ).string
+
+    @cached_property
+    def param_sql(self) -> str:
+        """
+        SQL text with pyformat placeholders for execution with params, compiled once per QueryType.
+        """
+        return self.sql.compile(dialect=postgresql.dialect()).string
+
+    @cached_property
+    def prepared(self) -> PreparedStatement:
+        """
+        Server-side prepared form of the statement, compiled once per QueryType.
+
+        Parameters are declared with the types of their bind parameters where known, and as
+        `unknown` otherwise so that the server infers them from context.
+        """
+        compiled = self.sql.compile(dialect=postgresql.dialect(paramstyle="numeric_dollar"))
+        type_compiler = compiled.dialect.type_compiler_instance
+        param_names = tuple(compiled.positiontup or ())
+        param_types = [
+            "unknown" if isinstance(compiled.binds[name].type, NullType) else type_compiler.process(compiled.binds[name].type)
+            for name in param_names
+        ]
+
+        name = f"q_{sha1(compiled.string.encode()).hexdigest()[:16]}"
+        prepare_sql = f"PREPARE {name} ({', '.join(param_types)}) AS {compiled.string}" if param_names \
+            else f"PREPARE {name} AS {compiled.string}"
+        execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * len(param_names))})" if param_names \
+            else f"EXECUTE {name}"
+
+        return PreparedStatement(
+            name=name,
+            prepare_sql=prepare_sql,
+            execute_sql=execute_sql,
+            param_names=param_names,
+            defaults=dict(compiled.params)
+        )
@@ -1,20 +1,49 @@
+from collections import deque
 from logging import Logger
-from typing import Any, List
-from watchdog.events import PatternMatchingEventHandler
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from typing import Any, Deque, List, Optional, Tuple
+from watchdog.events import FileSystemEventHandler
 from db.database_interface import IDatabase
 from db.db_context_manager import ManagedConnection
 from event_handlers.event_handler_interface import IEventHandler
 from processors.processor_interface import IProcessor
+import fnmatch
+import os
+import re
+import time
 
+# Queued once per worker by `stop()` to tell the worker to exit
+_STOP = object()
 
-class DataEventHandler(IEventHandler, PatternMatchingEventHandler):
+
+class DataEventHandler(IEventHandler, FileSystemEventHandler):
     """
     Generic event handler for file change events.
 
-    This class extends PatternMatchingEventHandler from watchdog to handle file events
+    This class extends FileSystemEventHandler from watchdog to handle file events
     for any type of data entity. It processes the created files
     by invoking the appropriate processor and manages database connections.
 
+    File names are matched against `patterns` with a single regular expression compiled
+    once at construction, instead of re-matching every pattern against the full path per event.
+
+    Created files are put on a bounded queue drained by `workers` worker threads. A worker collects
+    every file that arrives within `batch_window` seconds of the first one, up to `max_batch_files`
+    files, and hands them to the processor as one batch, so a burst of small files is loaded with a single COPY and
+    commit. When `max_pending` files are queued, further files are dropped rather than blocking the
+    observer thread, which dispatches the events of every watched directory. Once the queue has
+    drained, a worker rescans `watch_directory` and processes every matching file in it, oldest
+    first, so dropped files are still loaded; files processed before are skipped by the manifest.
+    Each worker checks out its own database connection once and keeps it for its lifetime, so
+    batches are loaded in parallel on up to `workers` connections without a pool checkout per
+    batch. The pool must therefore hold at least one connection per worker, which
+    `configure_database` ensures; a worker without a connection would block with its batch
+    taken off the queue. A connection that breaks is returned to the pool and replaced before
+    the next batch.
+
+    `stop()` lets the workers finish the files already queued, release their connections and exit.
+
     This replaces entity-specific event handlers (OrderEventHandler, CustomerEventHandler, etc.)
     with a single configurable implementation.
 
@@ -23,27 +52,180 @@ class DataEventHandler(IEventHandler, PatternMatchingEventHandler):
         db_conn: IDatabase instance for managing database connections
         patterns: List of file patterns to watch
         logger: Logger for tracking events and errors
+        batch_window: Seconds to wait after the first file of a batch for more files
+        max_pending: Maximum number of files queued for processing
+        workers: Number of worker threads, each processing batches on its own connection
+        max_batch_files: Maximum number of files processed together as one batch
+        watch_directory: Directory rescanned for dropped files; without one, dropped files are only logged
     """
-    def __init__(self, processor: IProcessor, db_conn: IDatabase, patterns: List[str], logger: Logger):
+    def __init__(self,
+                 processor: IProcessor,
+                 db_conn: IDatabase,
+                 patterns: List[str],
+                 logger: Logger,
+                 batch_window: float = 0.5,
+                 max_pending: int = 1000,
+                 workers: int = 1,
+                 max_batch_files: int = 64,
+                 watch_directory: Optional[str] = None):
         self.processor = processor
         self.db_conn = db_conn
         self.logger = logger
-        PatternMatchingEventHandler.__init__(self, patterns=patterns, ignore_directories=True)
+        self.batch_window = batch_window
+        self.max_batch_files = max_batch_files
+        self.watch_directory = watch_directory
+        self._queue: Queue = Queue(maxsize=max_pending)
+        # Files dropped because the queue was full; only updated on the observer thread
+        self.dropped_files: int = 0
+        # Set when a file is dropped, until the watch directory has been rescanned
+        self._overflowed: Event = Event()
+        self._rescan_lock: Lock = Lock()
+        # Files found by the last rescan, processed before the queue
+        self._backlog: Deque[str] = deque()
+        # Case-insensitive like watchdog's PatternMatchingEventHandler default, so ORDERS.CSV still matches
+        self._pattern = re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns), re.IGNORECASE)
+        self._workers = [Thread(target=self._drain, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
 
     def on_created(self, event: Any) -> None:
         """
         Handles the processing of new raw files.
 
         This method is triggered when a raw CSV file is created in the watched directory.
-        It processes the file using the IProcessor, and manages database connections
-        using a context manager to ensure proper connection cleanup.
+        The file is queued and processed by a worker thread together with any other files
+        that arrive within the batch window. If the queue is full the file is dropped and
+        logged, so one slow entity cannot stall event dispatch for the other watched directories,
+        and picked up again by the next rescan of the watch directory.
 
         Args:
             event: File system event containing the path of the created file
         """
         if event:
+            try:
+                self._queue.put_nowait(event.src_path)
+            except Full:
+                self.dropped_files += 1
+                self._overflowed.set()
+                self.logger.warning("Processing queue full, dropping file %s until the next rescan (%s dropped so far)",
+                                    event.src_path, self.dropped_files)
+
+    def dispatch(self, event: Any) -> None:
+        """
+        Dispatches file events whose name matches the handler's patterns.
+
+        Directory events and non-matching files are dropped here, before watchdog's per-event
+        dispatch, so they cost a single regex match.
+
+        Args:
+            event: File system event to dispatch
+        """
+        if not event.is_directory and self._pattern.match(os.path.basename(event.src_path)):
+            super().dispatch(event)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the worker threads once they have processed the files already queued.
+
+        One stop marker per worker is queued behind the pending files, so each worker processes
+        them, rescans the watch directory if files were dropped, releases its connection and exits. Call it once the observer has stopped
+        delivering events to the handler.
+
+        Args:
+            timeout: Seconds to wait for each worker to exit, or None to wait until it does
+        """
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _drain(self) -> None:
+        """
+        Worker loop collecting queued files into batches and processing them one batch at a time.
+
+        The worker's connection is acquired for its first batch and reused for every following
+        batch. It is only released, and a new one acquired, once it has been closed. The loop
+        ends once the worker has taken a stop marker off the queue and no files are left to process.
+        """
+        stopping = False
+        while True:
+            csv_files, stopping = self._next_batch(stopping)
+            if not csv_files:
+                return
             try:
                 with ManagedConnection(self.db_conn) as conn:
-                    self.processor.process_file(event.src_path, conn)
+                    while csv_files:
+                        self._process(csv_files, conn)
+                        if conn.closed:
+                            break
+                        csv_files, stopping = self._next_batch(stopping)
             except Exception as e:
-                self.logger.error(f"Error processing file {event.src_path}: {e}")
+                self.logger.error("Error acquiring connection for files %s: %s", csv_files, e)
+
+    def _next_batch(self, stopping: bool) -> Tuple[List[str], bool]:
+        """
+        Collects the next batch of files, and whether the worker has taken its stop marker.
+
+        Files found by a rescan are batched first. Otherwise waits for the first queued file and
+        adds the files arriving within its batch window until the batch holds `max_batch_files`
+        files. Once stopping, the queue is no longer read and an empty batch means the worker is done.
+
+        Args:
+            stopping: Whether the worker has already taken its stop marker off the queue
+        """
+        # Rescan once the queue has drained, or before stopping so dropped files are not left behind
+        if self._overflowed.is_set() and (stopping or self._queue.empty()):
+            self._rescan()
+        csv_files = []
+        while len(csv_files) < self.max_batch_files:
+            try:
+                csv_files.append(self._backlog.popleft())
+            except IndexError:
+                break
+        if csv_files or stopping:
+            return csv_files, stopping
+
+        csv_file = self._queue.get()
+        if csv_file is _STOP:
+            return self._next_batch(stopping=True)
+        csv_files.append(csv_file)
+
+        deadline = time.monotonic() + self.batch_window
+        while len(csv_files) < self.max_batch_files and (remaining := deadline - time.monotonic()) > 0:
+            try:
+                csv_file = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if csv_file is _STOP:
+                return csv_files, True
+            csv_files.append(csv_file)
+        return csv_files, False
+
+    def _rescan(self) -> None:
+        """
+        Adds every matching file in the watch directory to the backlog, oldest first, after files were dropped.
+        """
+        with self._rescan_lock:
+            if not self._overflowed.is_set():
+                return
+            self._overflowed.clear()
+            if self.watch_directory is None:
+                return
+            try:
+                with os.scandir(self.watch_directory) as entries:
+                    files = [entry for entry in entries if entry.is_file() and self._pattern.match(entry.name)]
+                files.sort(key=lambda entry: (entry.stat().st_mtime_ns, entry.name))
+            except OSError:
+                self.logger.error("Failed to rescan %s for dropped files", self.watch_directory, exc_info=True)
+                return
+            self.logger.info("Rescanned %s for dropped files, found %s file(s)", self.watch_directory, len(files))
+            self._backlog.extend(entry.path for entry in files)
+
+    def _process(self, csv_files: List[str], conn: Any) -> None:
+        """
+        Processes a batch of files on the given connection.
+        """
+        try:
+            self.processor.process_batch(csv_files, conn)
+        except Exception as e:
+            self.logger.error("Error processing files %s: %s", csv_files, e)
@@ -1,16 +1,17 @@
 from logging import Logger, basicConfig, INFO, FileHandler, StreamHandler, getLogger
-from typing import Iterator
+from typing import TYPE_CHECKING, Iterator
 from dotenv import load_dotenv
-from processors.processor_factory import ProcessorFactory
-from db.postgres_manager import PostgresManager
-from db.postgres_db import PostgresDB
-from sqlalchemy import create_engine
 from config.processor_configuration import CONFIG
-from processors.processor_interface import IProcessor
-from db.database_manager_interface import IDatabaseManager
-from daemons.daemon import Daemon
 import os
 
+# SQLAlchemy, psycopg2 and watchdog are imported where they are first needed, so importing
+# this module stays cheap
+if TYPE_CHECKING:
+    from processors.processor_interface import IProcessor
+    from db.database_manager_interface import IDatabaseManager
+    from daemons.daemon import Daemon
+    from daemons.daemon_factory import DaemonFactory
+
 load_dotenv()
 
 
@@ -26,45 +27,84 @@ def setup_logging(name: str):
     return getLogger(name)
 
 
-def configure_database(logger: Logger):
+def configure_database(logger: Logger, workers: int = 1):
+    from sqlalchemy import URL, create_engine
+    from db.postgres_db import PostgresDB
+    from db.postgres_manager import PostgresManager
+
+    # Every worker thread holds a connection for its lifetime, so the pool needs one per worker
+    # plus headroom; POSTGRES_MAX_CONN can raise the limit but not take it below that
+    required_conn = workers + 1
+    max_conn = int(os.getenv('POSTGRES_MAX_CONN', max(5, required_conn)))
+    if max_conn < required_conn:
+        logger.warning("POSTGRES_MAX_CONN=%s is below the %s connections needed by %s workers, using %s",
+                       max_conn, required_conn, workers, required_conn)
+        max_conn = required_conn
+
     pg_client = PostgresDB(
         dbname=os.getenv('POSTGRES_DB'),
         user=os.getenv('POSTGRES_USER'),
         password=os.getenv('POSTGRES_PASSWORD'),
         host=os.getenv('POSTGRES_HOST'),
         port=os.getenv('POSTGRES_PORT'),
-        min_conn=1,
-        max_conn=5,
+        min_conn=int(os.getenv('POSTGRES_MIN_CONN', 1)),
+        max_conn=max_conn,
         logger=logger
     )
+    # The engine is only used for DDL, so it keeps its own small pool rather than holding
+    # connections checked out of the PostgresDB pool that the workers draw from.
     engine = create_engine(
-        "postgresql+psycopg2://",
-        creator=pg_client.get_connection
+        URL.create(
+            "postgresql+psycopg2",
+            username=os.getenv('POSTGRES_USER'),
+            password=os.getenv('POSTGRES_PASSWORD'),
+            host=os.getenv('POSTGRES_HOST'),
+            port=os.getenv('POSTGRES_PORT'),
+            database=os.getenv('POSTGRES_DB')
+        ),
+        pool_size=1,
+        max_overflow=1,
+        pool_pre_ping=True,
+        pool_recycle=600
     )
     pg_manager = PostgresManager(engine=engine, logger=logger)
     return pg_client, pg_manager
 
 
 def get_processors_and_daemons(processor_types: dict[dict],
-                               pg_manager: IDatabaseManager,
-                               app_logger: Logger) -> Iterator[tuple[str, IProcessor, Daemon]]:
+                               pg_manager: "IDatabaseManager",
+                               daemon_factory: "DaemonFactory",
+                               app_logger: Logger) -> Iterator[tuple[str, "IProcessor", "Daemon"]]:
+    from processors.processor_factory import ProcessorFactory
+
     processor_factory = ProcessorFactory(pg_manager, app_logger)
     for process_name, settings in processor_types.items():
         processor = processor_factory.get_processor(process_name)
-        daemon = Daemon(settings["watch_directory"], settings["is_daemon"], app_logger)
+        daemon = daemon_factory.get_daemon(settings["watch_directory"],
+                                           settings["is_daemon"],
+                                           settings.get("workers", 1),
+                                           settings.get("batch_window_ms", 500),
+                                           settings.get("max_batch_files", 64))
         yield process_name, processor, daemon
 
 
 def main():
+    from daemons.daemon_factory import DaemonFactory
+
     app_logger = setup_logging('db')
-    pg_client, pg_manager = configure_database(app_logger)
+    workers = sum(settings.get("workers", 1) for settings in CONFIG.values())
+    pg_client, pg_manager = configure_database(app_logger, workers=workers)
+    daemon_factory = DaemonFactory(app_logger)
 
     for process_name, processor, daemon in get_processors_and_daemons(processor_types=CONFIG,
                                                                 pg_manager=pg_manager,
+                                                                daemon_factory=daemon_factory,
                                                                 app_logger=app_logger):
-        app_logger.info(f"Starting daemon for {process_name}")
+        app_logger.info("Starting daemon for %s", process_name)
         daemon.run(processor, pg_client)
 
+    daemon_factory.run()
+
 
 if __name__ == '__main__':
     main()
@@ -13,7 +13,9 @@ tmp_customer = Table(
     Column("last_name", Text),
     Column("email", Text),
     Column("processed_at", DateTime, server_default=func.now()),
-    schema="raw"
+    schema="raw",
+    # Staged rows are merged and deleted within one transaction, so they never need WAL
+    prefixes=["UNLOGGED"]
 )
 
 customer = Table(
@@ -31,7 +33,7 @@ customer_manifest = Table(
     "customer_manifest",
     manifest_metadata,
     Column("file_name", String),
-    Column("digest", String, primary_key=True),
+    Column("digest", String, primary_key=True, comment="xxHash3 128-bit fingerprint of the file contents, hex"),
     Column("file_size", BigInteger),
     Column("processed_at", BigInteger),
     schema="raw"
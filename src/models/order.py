@@ -17,7 +17,9 @@ tmp_order = Table(
     Column("price_per_unit", Numeric(10, 2)),
     Column("status", Text),
     Column("processed_at", DateTime, server_default=func.now()),
-    schema="raw"
+    schema="raw",
+    # Staged rows are merged and deleted within one transaction, so they never need WAL
+    prefixes=["UNLOGGED"]
 )
 
 order = Table(
@@ -38,7 +40,7 @@ order_manifest = Table(
     "order_manifest",
     manifest_metadata,
     Column("file_name", String),
-    Column("digest", String, primary_key=True),
+    Column("digest", String, primary_key=True, comment="xxHash3 128-bit fingerprint of the file contents, hex"),
     Column("file_size", BigInteger),
     Column("processed_at", BigInteger),
     schema="raw"
@@ -1,16 +1,24 @@
 import os
+from collections import OrderedDict
 from logging import Logger
-from datetime import datetime
-from typing import Any
-from sqlalchemy import column, select, text
-from sqlalchemy.dialects.postgresql import insert
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Iterable, Optional, Union
+from sqlalchemy import Table, bindparam, column, delete, exists, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy import Connection
 from db.postgres_manager import PostgresManager
 from db.query_types import QueryReturnType, QueryType
-from utils.utils import get_md5, extract_file_name
+from utils.utils import get_cached_fingerprint, get_content_fingerprint, extract_file_name
 from processors.processor_interface import IProcessor
 from processors.processor_config import ProcessorConfig
 
+# Maximum number of manifest digests remembered, and seconds each is trusted before the manifest
+# is asked again, so deleting manifest rows to force a reload takes effect within that time
+SEEN_DIGESTS_MAX = 100_000
+SEEN_DIGESTS_TTL = 300
+
 
 class PostgresDataProcessor(IProcessor):
     """
@@ -21,7 +29,7 @@ class PostgresDataProcessor(IProcessor):
 
     The processor handles:
     - Dropping and creating necessary tables
-    - Deduplication using MD5 digest tracking
+    - Deduplication using content fingerprint (xxHash3) tracking
     - Inserting data from CSV files into temporary tables
     - Merging data from temporary tables into target tables with upsert logic
     - Maintaining a manifest of processed files
@@ -40,23 +48,40 @@ class PostgresDataProcessor(IProcessor):
         self.database_manager: PostgresManager = database_manager
         self.logger: Logger = logger
 
-    def generate_manifest_fields(self, file: str) -> dict[str, Any]:
+        # Merge queries per (tmp, target) table pair; they only depend on the fixed table schemas,
+        # so each pair's queries are built and compiled once. The entity's own pair is built upfront.
+        self._merge_queries: dict[tuple[Table, Table], list[QueryType]] = {}
+        self._get_merge_queries(self.config.tmp_table, self.config.target_table)
+        self._manifest_insert_query = self._new_manifest_rows_query()
+        # Digests recently found in the manifest with the time each was recorded, oldest first;
+        # shared by all workers
+        self._seen_digests: OrderedDict[str, float] = OrderedDict()
+        self._seen_digests_lock: Lock = Lock()
+
+    def generate_manifest_fields(self,
+                                 file: str,
+                                 digest: Optional[str] = None,
+                                 stat: Optional[os.stat_result] = None) -> dict[str, Any]:
         """
         Generates a manifest dictionary containing metadata about a file.
 
-        This method extracts the file name, calculates its MD5 digest, retrieves its size,
-        and records the time of processing. The resulting manifest is returned as a dictionary.
+        This method extracts the file name, calculates its content fingerprint unless one is given, retrieves
+        its size, and records the time of processing. The resulting manifest is returned as a dictionary.
 
         Args:
             file: Path to the file being processed
+            digest: Already computed fingerprint of the file, to avoid hashing it a second time
+            stat: Already obtained stat result of the file, to avoid another stat call
 
         Returns:
             Dictionary containing file_name, digest, file_size, and processed_at timestamp
         """
         file_name = extract_file_name(file)
-        digest = get_md5(file)
-        file_size = os.path.getsize(file)
-        processed_at = datetime.now().timestamp()
+        if digest is None:
+            digest = get_content_fingerprint(file)
+        file_size = (stat or os.stat(file)).st_size
+        # Whole epoch seconds, matching the manifest's BigInteger processed_at column
+        processed_at = int(time())
         manifest = {
             "file_name": file_name,
             "digest": digest,
@@ -68,102 +93,291 @@ class PostgresDataProcessor(IProcessor):
 
     def set_up_tables(self) -> None:
         """
-        Drops and creates tables in the database.
+        Creates missing tables in the database and empties the temporary table.
 
-        This method drops the temporary table and then creates both the temporary
-        and manifest tables for the configured entity.
+        This method creates the temporary and manifest tables for the configured entity if
+        they do not exist yet, then truncates the temporary table. Truncating an existing
+        staging table is cheaper than dropping and recreating it, and keeps its statistics.
+        Because existing tables are kept, a temporary table created before it was declared
+        UNLOGGED is converted here.
         """
-        self.logger.info(f"Dropping and Creating {self.config.entity_name} tables...")
-        self.database_manager.drop_table(self.config.tmp_metadata)
+        self.logger.info("Creating and Truncating %s tables...", self.config.entity_name)
         self.database_manager.create_table(self.config.tmp_metadata)
         self.database_manager.create_table(self.config.manifest_metadata)
+        self.database_manager.set_unlogged(self.config.tmp_metadata)
+        self.database_manager.truncate_table(self.config.tmp_metadata)
 
     def process_file(self, csv_file: str, conn: Connection) -> None:
         """
-        Processes a CSV file by performing a series of actions to update the database.
-
-        This method checks if the file's digest is already present in the manifest table.
-        If the digest is not found, it processes the file by:
-        1. Copying data from the CSV file into the temporary table.
-        2. Generating the manifest fields for the file.
-        3. Inserting the manifest data into the manifest table.
-        4. Merging the data from the temporary table into the main target table.
+        Processes a single CSV file by performing a series of actions to update the database.
 
-        If any exceptions are raised during the process, they are logged for further investigation.
+        This is a batch of one; see `process_batch` for the steps performed.
 
         Args:
             csv_file: Path to the CSV file to process
             conn: Active SQLAlchemy database connection
         """
-        self.logger.info("Generating Digest...")
-        digest = get_md5(csv_file)
-        self.logger.info(f"MD5: {digest}")
+        self.process_batch([csv_file], conn)
 
-        digest_query_stm = select(
-            select(text("1"))
-            .select_from(self.config.manifest_table)
-            .where(column("digest") == digest)
-            .exists()
-        )
+    def process_batch(self, csv_files: list[str], conn: Connection) -> None:
+        """
+        Processes several CSV files with a single COPY and merge.
+
+        The manifest rows for the batch are inserted first with `ON CONFLICT DO NOTHING`, which
+        records the new files and reports which of them were not processed before in the same
+        round trip. Files whose digest was already recorded, or that repeat earlier files in the
+        batch, are skipped. Digests this processor has recently seen in the manifest are skipped
+        before any query is sent, so a batch of files that were all processed recently costs no
+        round trip at all. The remaining files are processed by:
+        1. Copying data from all of the CSV files into the temporary table in one COPY stream.
+        2. Merging the data from the temporary table into the main target table once.
+
+        The manifest insert, the COPY and the merge run in a single transaction, so a batch is
+        either recorded in the manifest and merged, or not loaded at all; a concurrent batch
+        containing the same file waits on the manifest row and then skips it. A file that cannot
+        be read is logged and left out of the batch, and the remaining files are still processed.
+
+        If the batch fails to load, its transaction is rolled back and its files are loaded again
+        one at a time, in the order they arrived. Files of one batch may hold rows with the same
+        primary key, which the temporary table rejects within a single COPY, and only separate
+        transactions give the later file a more recent `processed_at` so that its rows win the
+        merge. Files that still fail on their own are rolled back and logged as failed.
 
-        digest_query = QueryType(
-            name=f"{self.config.entity_name}_digest_query",
-            sql=digest_query_stm,
-            return_type=QueryReturnType.SCALAR
-        )
+        Args:
+            csv_files: Paths to the CSV files to process
+            conn: Active SQLAlchemy database connection
+        """
+        digests = {}
+        stats = {}
+        for csv_file in csv_files:
+            self.logger.info("Generating Digest...")
+            try:
+                stats[csv_file] = os.stat(csv_file)
+                digest = get_cached_fingerprint(csv_file, stats[csv_file])
+            except OSError:
+                self.logger.error("Failed to read %s, skipping it", csv_file, exc_info=True)
+                continue
+            self.logger.info("Fingerprint: %s", digest)
+            if digest in digests:
+                self.logger.info("Batch already processed: %s", csv_file)
+                continue
+            digests[digest] = csv_file
+
+        if not digests:
+            return
+
+        try:
+            self._load_files(digests, stats, conn)
+            return
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            if len(digests) == 1:
+                self.logger.error("Failed to load file: %s", next(iter(digests.values())), exc_info=True)
+                return
+            self.logger.warning("Batch of %s files failed, loading them one at a time", len(digests), exc_info=True)
+
+        for digest, csv_file in digests.items():
+            try:
+                self._load_files({digest: csv_file}, stats, conn)
+            except Exception:
+                self.logger.error("Failed to load file: %s", csv_file, exc_info=True)
+                if not conn.closed:
+                    conn.rollback()
+
+    def _load_files(self, digests: dict[str, str], stats: dict[str, os.stat_result], conn: Connection) -> None:
+        """
+        Records the files in the manifest, copies the new ones and merges them in one transaction.
+
+        Digests this processor has recently seen in the manifest are skipped before any query is
+        sent. The transaction is committed on success; on failure the exception is raised and
+        the caller rolls back.
+
+        Args:
+            digests: Path of each file to load, keyed by its content fingerprint
+            stats: Stat result of each file
+            conn: Active SQLAlchemy database connection
+        """
+        seen_digests = self._get_seen_digests(digests)
+        manifest_rows = [
+            self.generate_manifest_fields(csv_file, digest=digest, stat=stats[csv_file])
+            for digest, csv_file in digests.items()
+            if digest not in seen_digests
+        ]
+        new_digests = self.insert_manifest_rows(manifest_rows, conn) if manifest_rows else set()
+        new_files = [csv_file for digest, csv_file in digests.items() if digest in new_digests]
+        for digest, csv_file in digests.items():
+            if digest not in new_digests:
+                self.logger.info("Batch already processed: %s", csv_file)
+
+        if not new_files:
+            conn.rollback()
+            self._remember_digests(digests)
+            return
+
+        self.logger.info("Processing new batch of %s file(s)...", len(new_files))
+        staged = self.database_manager.execute_csv_copy_many(self.config.tmp_table, new_files, conn, commit=False)
+        self.logger.info("Rows staged in %s: %s", self.config.tmp_table, staged)
+        self.merge_tables(self.config.tmp_table, self.config.target_table, conn)
+        conn.commit()
+        self._remember_digests(digests)
+
+    def _get_seen_digests(self, digests: Iterable[str]) -> set[str]:
+        """
+        Returns the given digests that were recently found in the manifest.
+
+        Only digests this processor inserted or found already recorded are remembered, so nothing
+        is read from the manifest upfront. At most `SEEN_DIGESTS_MAX` digests are kept, the oldest
+        being forgotten first, and each is trusted for `SEEN_DIGESTS_TTL` seconds; a forgotten
+        digest costs one manifest insert round trip, whose primary key conflict still skips the file.
+        The record is exact rather than a Bloom filter, because a false positive would skip a new file.
+        """
+        expired = monotonic() - SEEN_DIGESTS_TTL
+        with self._seen_digests_lock:
+            while self._seen_digests and next(iter(self._seen_digests.values())) <= expired:
+                self._seen_digests.popitem(last=False)
+            return {digest for digest in digests if digest in self._seen_digests}
+
+    def _remember_digests(self, digests: Iterable[str]) -> None:
+        """
+        Records digests that are in the manifest, forgetting the oldest ones beyond `SEEN_DIGESTS_MAX`.
+        """
+        now = monotonic()
+        with self._seen_digests_lock:
+            for digest in digests:
+                self._seen_digests[digest] = now
+                self._seen_digests.move_to_end(digest)
+            while len(self._seen_digests) > SEEN_DIGESTS_MAX:
+                self._seen_digests.popitem(last=False)
+
+    def insert_manifest_rows(self, manifest_rows: list[dict[str, Any]], conn: Connection) -> set[str]:
+        """
+        Inserts manifest rows for files not yet recorded, without committing.
+
+        The rows are inserted with a single `INSERT ... ON CONFLICT (digest) DO NOTHING RETURNING
+        digest`, so checking and recording a batch costs one round trip. Rows whose digest is
+        already in the manifest are left out by the primary key conflict. Each manifest column is
+        sent as one array parameter, so the same prepared statement serves batches of any size.
+
+        Args:
+            manifest_rows: Manifest fields of the files in the batch
+            conn: Active SQLAlchemy database connection
+
+        Returns:
+            Digests of the rows that were inserted, i.e. of the files not processed before
+        """
+        params = {
+            col.name: [row[col.name] for row in manifest_rows]
+            for col in self.config.manifest_table.columns
+        }
 
         results = self.database_manager.execute_read(
-            query_type=digest_query,
-            conn=conn
-            )
+            query_type=self._manifest_insert_query,
+            conn=conn,
+            params=params
+        )
 
-        if not results[0]:
-            try:
-                self.logger.info("Processing new batch...")
-                self.database_manager.execute_csv_copy(self.config.tmp_table, csv_file, conn)
-                manifest_cols = self.generate_manifest_fields(csv_file)
-                self.insert_to_table(self.config.manifest_table, manifest_cols, conn)
-                self.merge_tables(self.config.tmp_table, self.config.target_table, conn)
-            except Exception:
-                self.logger.error("Failure Occurred: ", exc_info=True)
+        return {row["digest"] for row in results}
 
-        else:
-            self.logger.info("Batch already processed")
+    def _new_manifest_rows_query(self) -> QueryType:
+        """
+        Builds the query inserting unrecorded manifest rows from one array parameter per column.
+        """
+        manifest_table = self.config.manifest_table
+        columns = list(manifest_table.columns)
+        unnest_rows = (
+            text(f"SELECT * FROM unnest({', '.join(f':{col.name}' for col in columns)})")
+            .bindparams(*[bindparam(col.name, type_=ARRAY(col.type)) for col in columns])
+            .columns(*[column(col.name) for col in columns])
+        )
+        insert_stm = (
+            insert(manifest_table)
+            .from_select([col.name for col in columns], unnest_rows)
+            .on_conflict_do_nothing(index_elements=[manifest_table.c.digest])
+            .returning(manifest_table.c.digest)
+        )
 
-    def insert_to_table(self, table_name: str, columns: dict[str:str], conn: Connection) -> None:
+        return QueryType(
+            name=f"{self.config.entity_name}_manifest_insert_query",
+            sql=insert_stm,
+            return_type=QueryReturnType.ALL
+        )
+
+    def insert_to_table(self,
+                        table_name: str,
+                        columns: Union[dict[str, Any], list[dict[str, Any]]],
+                        conn: Connection) -> None:
         """
-        Inserts a row into the specified table.
+        Inserts one or more rows into the specified table without committing.
+
+        A list of rows is sent with psycopg2's `execute_values`, which packs many rows into each
+        INSERT statement instead of executing one statement per row.
 
         Args:
             table_name: Table to insert into
-            columns: Dictionary of column names and values
+            columns: Dictionary of column names and values, or a list of them for several rows
             conn: Active SQLAlchemy database connection
         """
-        self.logger.info(f"Inserting to {table_name}")
-        insert_stm = insert(table_name).values(columns)
+        self.logger.info("Inserting to %s", table_name)
+        if isinstance(columns, list):
+            if not columns:
+                return
+            column_names = list(columns[0])
+            self.database_manager.execute_write(
+                query_type=self._bulk_insert_query(table_name, column_names),
+                conn=conn,
+                params=[tuple(row[name] for name in column_names) for row in columns],
+                commit=False
+            )
+            return
 
-        insert_query = QueryType(
+        self.database_manager.execute_write(
+            query_type=self._insert_query(table_name, columns),
+            conn=conn,
+            commit=False
+        )
+
+    def _insert_query(self, table_name: str, columns: dict[str, Any]) -> QueryType:
+        """
+        Builds the query inserting a row into the specified table.
+        """
+        return QueryType(
             name=f"{self.config.entity_name}_insert_query",
-            sql=insert_stm,
+            sql=insert(table_name).values(columns),
             return_type=QueryReturnType.NONE
         )
 
-        self.database_manager.execute_write(
-            query_type=insert_query,
-            conn=conn
+    def _bulk_insert_query(self, table_name: Table, column_names: list[str]) -> QueryType:
+        """
+        Builds the `execute_values` query inserting rows of the given columns into the specified table.
+        """
+        preparer = postgresql.dialect().identifier_preparer
+        columns_str = ", ".join(preparer.quote(name) for name in column_names)
+        return QueryType(
+            name=f"{self.config.entity_name}_bulk_insert_query",
+            sql=insert(table_name),
+            return_type=QueryReturnType.NONE,
+            is_bulk_insert=True,
+            values_template=f"INSERT INTO {preparer.format_table(table_name)} ({columns_str}) VALUES %s"
         )
 
     def merge_tables(self, tmp_table: str, target_table: str, conn: Connection) -> None:
         """
         Performs an upsert operation by merging data from a temporary table into a target table.
 
-        This method reads all records from a temporary staging table and inserts them into
-        the target table. If a row with the same primary key already exists in the target table,
+        This method merges all records from a temporary staging table into the target table
+        without reading them back into Python. If a row with the same primary key already exists in the target table,
         the existing row is updated only if the corresponding record in the temporary table
         has a more recent `processed_at` timestamp.
 
-        The merge operation is executed using a SQLAlchemy `INSERT ... ON CONFLICT DO UPDATE`
-        statement to ensure data consistency while avoiding duplicate primary key violations.
+        The merge is split into an `UPDATE ... FROM` for rows already in the target table and an
+        `INSERT ... SELECT ... WHERE NOT EXISTS` for new rows, followed by a `DELETE` emptying the
+        temporary table, all sent together in one round trip.
+        Unlike a single `INSERT ... ON CONFLICT DO UPDATE`, existing rows are found by an index probe
+        instead of a speculative insertion that conflicts. New rows are inserted in primary key
+        order, read from the temporary table's primary key index, so consecutive insertions land
+        on neighbouring pages of the target's primary key index. The insert keeps `ON CONFLICT DO NOTHING`
+        so a row inserted concurrently by another batch is not a primary key violation.
 
         Args:
             tmp_table: Temporary table containing staged data
@@ -171,54 +385,68 @@ class PostgresDataProcessor(IProcessor):
             conn: Active SQLAlchemy database connection
 
         Behavior:
-            - Reads all records from tmp_table
-            - Inserts new records into target_table
             - Updates existing records only when the processed_at timestamp
               in the source (temporary) table is more recent
-            - Logs intermediate queries and execution results for debugging
+            - Inserts new records from tmp_table into target_table server-side
+            - Deletes the merged records from tmp_table, so every batch is staged into an empty
+              table and only merges its own rows. Batches loaded concurrently by other workers are
+              not visible until they commit, by which time they have deleted their rows as well.
+            - Does not commit; the caller commits the merge together with the rest of the batch
         """
-        self.logger.info(f"Merging into {target_table}")
-        select_tmp_stm = select(text("*")).select_from(tmp_table)
-
-        select_tmp_query = QueryType(
-            name=f"{self.config.entity_name}_select_tmp_query",
-            sql=select_tmp_stm,
-            return_type=QueryReturnType.ALL
+        self.logger.info("Merging into %s", target_table)
+        self.database_manager.execute_write_many(
+            [(merge_query, None) for merge_query in self._get_merge_queries(tmp_table, target_table)],
+            conn,
+            commit=False
         )
 
-        results = self.database_manager.execute_read(
-            query_type=select_tmp_query,
-            conn=conn
+    def _get_merge_queries(self, tmp_table: Table, target_table: Table) -> list[QueryType]:
+        """
+        Returns the merge queries for a table pair, building them on first use.
+        """
+        key = (tmp_table, target_table)
+        merge_queries = self._merge_queries.get(key)
+        if merge_queries is None:
+            merge_queries = self._merge_queries[key] = self._build_merge_queries(tmp_table, target_table)
+        return merge_queries
+
+    def _build_merge_queries(self, tmp_table: Table, target_table: Table) -> list[QueryType]:
+        """
+        Builds the update, insert and delete queries merging the temporary table into the target table.
+        """
+        primary_key = self.config.primary_key_column
+        update_stmt = (
+            update(target_table)
+            .values({c.name: tmp_table.c[c.name] for c in target_table.columns if not c.primary_key})
+            .where(target_table.c[primary_key] == tmp_table.c[primary_key])
+            .where(tmp_table.c.processed_at > target_table.c.processed_at)
         )
-        self.logger.info("TMP QUERY RESULTS: %s" % results)
 
         insert_stmt = (
             insert(target_table)
             .from_select(
-                [col.name for col in self.config.tmp_table.columns],
-                select(self.config.tmp_table)
+                [col.name for col in tmp_table.columns],
+                select(tmp_table)
+                .where(~exists().where(target_table.c[primary_key] == tmp_table.c[primary_key]))
+                .order_by(tmp_table.c[primary_key])
             )
+            .on_conflict_do_nothing(index_elements=[primary_key])
         )
 
-        set_clause = {
-            c.name: getattr(insert_stmt.excluded, c.name)
-            for c in target_table.columns
-            if not c.primary_key
-        }
-
-        upsert_stmt = insert_stmt.on_conflict_do_update(
-            index_elements=[self.config.primary_key_column],
-            set_=set_clause,
-            where=insert_stmt.excluded.processed_at > target_table.c.processed_at
-        )
-
-        insert_target_query = QueryType(
-            name="merge_tmp_into_main",
-            sql=upsert_stmt,
-            return_type=QueryReturnType.NONE
-        )
-
-        self.database_manager.execute_write(
-            query_type=insert_target_query,
-            conn=conn
-        )
+        return [
+            QueryType(
+                name="merge_tmp_into_main_update",
+                sql=update_stmt,
+                return_type=QueryReturnType.NONE
+            ),
+            QueryType(
+                name="merge_tmp_into_main_insert",
+                sql=insert_stmt,
+                return_type=QueryReturnType.NONE
+            ),
+            QueryType(
+                name="merge_tmp_into_main_clear",
+                sql=delete(tmp_table),
+                return_type=QueryReturnType.NONE
+            ),
+        ]
@@ -1,8 +1,10 @@
 from logging import Logger
+from typing import Callable
 from db.database_manager_interface import IDatabaseManager
 from processors.data_processor import PostgresDataProcessor
 from processors.processor_interface import IProcessor
 from processors.config_factory import create_customer_config, create_order_config
+from processors.processor_config import ProcessorConfig
 
 
 class ProcessorFactory:
@@ -20,24 +22,34 @@ class ProcessorFactory:
     def __init__(self, database_manager: IDatabaseManager, logger: Logger):
         self.database_manager = database_manager
         self.logger = logger
+        # Config factory for each supported entity type
+        self._registry: dict[str, Callable[[], ProcessorConfig]] = {
+            "orders": create_order_config,
+            "customers": create_customer_config,
+            # "product": create_product_config,
+        }
+        self._instances: dict[str, IProcessor] = {}
 
     def get_processor(self, processor_type: str) -> IProcessor:
         """
-        Creates a processor instance for the specified entity type.
+        Returns the processor for the specified entity type.
+
+        Processors are created on first request and cached, so repeated requests for the same
+        entity type share one processor and its prebuilt statements.
 
         Args:
             processor_type: Type of processor to create
         """
         processor_type = processor_type.lower()
 
-        if processor_type == "orders":
-            config = create_order_config()
-            return PostgresDataProcessor(config, self.database_manager, self.logger)
-        elif processor_type == "customers":
-            config = create_customer_config()
-            return PostgresDataProcessor(config, self.database_manager, self.logger)
-        # elif processor_type == "product":
-        #     config = create_product_config()
-        #     return MySQLDataProcessor(config, self.database_manager, self.logger)
-        else:
+        processor = self._instances.get(processor_type)
+        if processor is not None:
+            return processor
+
+        create_config = self._registry.get(processor_type)
+        if create_config is None:
             raise ValueError(f"Unknown processor type: {processor_type}")
+
+        processor = PostgresDataProcessor(create_config(), self.database_manager, self.logger)
+        self._instances[processor_type] = processor
+        return processor
@@ -1,5 +1,7 @@
+import os
 from abc import ABC, abstractmethod
 from sqlite3 import Connection
+from typing import Any, Optional, Union
 
 
 class IProcessor(ABC):
@@ -19,7 +21,7 @@ class IProcessor(ABC):
         pass
 
     @abstractmethod
-    def generate_manifest_fields(self, file: str):
+    def generate_manifest_fields(self, file: str, digest: Optional[str] = None, stat: Optional[os.stat_result] = None):
         """
         Generates a set of manifest fields for a given file.
         """
@@ -33,9 +35,16 @@ class IProcessor(ABC):
         pass
 
     @abstractmethod
-    def insert_to_table(self, table_name, columns: dict[str:str], conn: Connection):
+    def process_batch(self, file_paths: list[str], conn: Connection):
         """
-        Inserts a row into the specified table.
+        Processes several files together, applying the operations of `process_file` once per batch.
+        """
+        pass
+
+    @abstractmethod
+    def insert_to_table(self, table_name, columns: Union[dict[str, Any], list[dict[str, Any]]], conn: Connection):
+        """
+        Inserts a row, or a list of rows, into the specified table without committing.
         """
         pass
     
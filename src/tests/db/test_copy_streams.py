@@ -0,0 +1,46 @@
+import pytest
+from db.copy_streams import ChainedCSVReader
+
+
+# Fixtures
+
+
+@pytest.fixture
+def chain(tmp_path):
+    """Returns everything a ChainedCSVReader streams for files with the given contents."""
+    def read_all(*contents, size=4):
+        paths = []
+        for i, content in enumerate(contents):
+            path = tmp_path / f"file_{i}.csv"
+            path.write_bytes(content)
+            paths.append(str(path))
+        with ChainedCSVReader(paths) as reader:
+            return b"".join(iter(lambda: reader.read(size), b""))
+    return read_all
+
+# Tests
+
+
+def test_drops_headers_of_following_files(chain):
+    """Test that only the first file's header is passed through."""
+    assert chain(b"a,b\n1,2\n", b"a,b\n3,4\n") == b"a,b\n1,2\n3,4\n"
+
+
+def test_empty_first_file(chain):
+    """Test that an empty first file does not cause the next file's header to be dropped."""
+    assert chain(b"", b"a,b\n1,2\n") == b"a,b\n1,2\n"
+
+
+def test_empty_middle_file(chain):
+    """Test that an empty file between two files is skipped."""
+    assert chain(b"a,b\n1,2\n", b"", b"a,b\n3,4\n") == b"a,b\n1,2\n3,4\n"
+
+
+def test_file_without_trailing_newline(chain):
+    """Test that a newline is inserted after a file that does not end with one."""
+    assert chain(b"a,b\n1,2", b"a,b\n3,4\n") == b"a,b\n1,2\n3,4\n"
+
+
+def test_header_only_file(chain):
+    """Test that header-only files pass their header through only when first, and add no rows."""
+    assert chain(b"a,b\n", b"a,b\n1,2\n", b"a,b\n") == b"a,b\n1,2\n"
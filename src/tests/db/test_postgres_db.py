@@ -1,53 +1,47 @@
-import datetime
-import threading
+import os
+import statistics
 import time
-from unittest.mock import MagicMock, patch
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from unittest.mock import patch
 import pytest
-from testcontainers.postgres import PostgresContainer
 from db.postgres_db import PostgresDB
 from db.db_context_manager import ManagedConnection
 
-postgres = PostgresContainer("postgres:16-alpine")
+# One connection per core, as larger pools only add context switching on the server, with at
+# least two so the threaded tests contend, and capped well below the server's default
+# max_connections of 100 so large machines do not run out of connection slots
+POOL_SIZE = min(max(2, os.cpu_count() or 1), 16)
 
 
 # Fixtures
 
 
-@pytest.fixture(scope="module", autouse=True)
-def postgres_container(request):
-    container = PostgresContainer("postgres:16-alpine")
-    container.start()
-
-    def cleanup():
-        container.stop()
-
-    request.addfinalizer(cleanup)
-    return container
-
-
-@pytest.fixture
-def db_config(postgres_container):
-    return {
-        "dbname": postgres_container.dbname,
-        "user": postgres_container.username,
-        "password": postgres_container.password,
-        "host": postgres_container.get_container_host_ip(),
-        "port": int(postgres_container.get_exposed_port(5432)),
-    }
-
-
-@pytest.fixture
-def logger():
-    return MagicMock()
+@pytest.fixture(scope="session")
+def executor():
+    """Thread pool reused by the threaded tests, large enough to oversubscribe the connection pool."""
+    with ThreadPoolExecutor(max_workers=max(16, POOL_SIZE * 2)) as executor:
+        yield executor
 
 
 @pytest.fixture
 def reset_singleton():
+    """Clears the singleton before and after the test, closing any pool the test left open."""
+    PostgresDB._instance = None
+    yield
+    instance = PostgresDB._instance
+    if instance is not None and getattr(instance, "_pool", None):
+        instance.close_pool()
     PostgresDB._instance = None
 
 
+@pytest.fixture(params=[POOL_SIZE])
+def pool_size(request):
+    return request.param
+
+
 @pytest.fixture
-def db_instance(db_config, logger, reset_singleton):
+def db_instance(db_config, logger, reset_singleton, pool_size):
     """Return a fresh PostgresDB instance."""
     return PostgresDB(
         db_config["dbname"],
@@ -56,10 +50,21 @@ def db_instance(db_config, logger, reset_singleton):
         db_config["host"],
         db_config["port"],
         min_conn=1,
-        max_conn=5,
+        max_conn=pool_size,
         logger=logger,
     )
 
+
+@pytest.fixture
+def warm_pool(db_instance, pool_size):
+    """
+    Opens every connection in the pool up front, so the TCP handshake and authentication of
+    each connection are paid before the test runs rather than while its threads race.
+    """
+    conns = [db_instance.get_connection() for _ in range(pool_size)]
+    for conn in conns:
+        db_instance.release_connection(conn)
+
 # Tests
 
 
@@ -78,35 +83,32 @@ def test_singleton(db_instance, db_config, logger):
     assert repr(db_instance) == expected_repr
 
 
-def test_get_and_release_connection_threaded(db_instance):
+@pytest.mark.usefixtures("warm_pool")
+@pytest.mark.parametrize("delay", [0.05])
+def test_get_and_release_connection_threaded(db_instance, pool_size, executor, delay):
     """Test threaded pool logic with multiple threads."""
     connections = []
-    delay = 0.5
 
-    def worker():
+    def worker(_):
         conn = db_instance.get_connection()
         connections.append(conn)
         time.sleep(delay)
         db_instance.release_connection(conn)
 
-    threads = [threading.Thread(target=worker) for _ in range(5)]
-    for t in threads:
-        t.start()
-    for t in threads:
-        t.join()
+    list(executor.map(worker, range(pool_size)))
 
-    assert len(connections) == 5
-    assert len(set(map(id, connections))) == 5  # max_conn
+    assert len(connections) == pool_size
+    assert len(set(map(id, connections))) == pool_size  # max_conn
 
     conn = db_instance.get_connection()
     assert conn is not None
     db_instance.release_connection(conn)
 
 
-def test_semaphore_enforces_max_connections(db_config, logger, reset_singleton):
+@pytest.mark.parametrize("delay", [0.05])
+def test_semaphore_enforces_max_connections(db_config, logger, reset_singleton, pool_size, executor, delay):
     """Test that semaphore prevents more than max_conn simultaneous connections."""
-    max_conn = 3
-    delay = 0.5
+    max_conn = pool_size
     db = PostgresDB(
         db_config["dbname"], db_config["user"], db_config["password"],
         db_config["host"], db_config["port"], 1, max_conn, logger
@@ -114,30 +116,46 @@ def test_semaphore_enforces_max_connections(db_config, logger, reset_singleton):
 
     active_conns = []
 
-    def worker():
+    def worker(_):
         conn = db.get_connection()
         active_conns.append(conn)
         time.sleep(delay)
         db.release_connection(conn)
 
-    # Set the number of threads to double the max_conn size
-    threads = [threading.Thread(target=worker) for _ in range(max_conn * 2)]
+    start = time.perf_counter()
+    # Run double the max_conn size of workers at once
+    list(executor.map(worker, range(max_conn * 2)))
 
-    start = datetime.datetime.now()
-    for t in threads:
-        t.start()
-    for t in threads:
-        t.join()
-    end = datetime.datetime.now()
+    # Semaphore should enforce max_conn: two batches of workers, with 10% tolerance for timer resolution
+    assert time.perf_counter() - start >= delay * 2 * 0.9
 
-    # Semaphore should enforce max_conn: total time >= 2 * 0.5 sec
-    assert (end - start).total_seconds() >= 1
 
+def test_semaphore_serves_waiters_fairly(db_config, logger, reset_singleton):
+    """Test that no thread is starved while many threads contend for a few connections."""
+    max_conn = 5
+    threads = 100
+    delay = 0.01
+    db = PostgresDB(
+        db_config["dbname"], db_config["user"], db_config["password"],
+        db_config["host"], db_config["port"], 1, max_conn, logger
+    )
 
-def test_get_instance_before_initialization(reset_singleton):
-    """Test that get_instance() raises error when not initialized."""
-    with pytest.raises(ValueError, match="PostgresDB not initialized"):
-        PostgresDB.get_instance()
+    waits = [0.0] * threads
+
+    def worker(i):
+        start = time.perf_counter()
+        conn = db.get_connection()
+        waits[i] = time.perf_counter() - start
+        time.sleep(delay)
+        db.release_connection(conn)
+
+    # A dedicated pool, so every thread is waiting on the semaphore rather than on the executor
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, range(threads)))
+
+    # With FIFO hand-off the waits spread evenly over the threads / max_conn rounds of workers,
+    # so the longest wait stays within a small multiple of the median one
+    assert max(waits) / statistics.median(waits) < 4
 
 
 def test_get_instance_after_initialization(db_instance):
@@ -201,7 +219,7 @@ def test_release_connection_always_releases_semaphore(db_instance):
     db_instance.release_connection(conn2)
 
 
-def test_managed_connection_context_manager(db_instance):
+def test_managed_connection_context_manager(db_instance, pool_size):
     """Test that ManagedConnection properly manages connections."""
     with ManagedConnection(db_instance) as conn:
         assert conn is not None
@@ -213,14 +231,13 @@ def test_managed_connection_context_manager(db_instance):
         cursor.close()
 
     # After context exits, connection should be released
-    # Verify by getting max_conn connections
-    conns = []
-    for _ in range(5):  # max_conn is 5
-        with ManagedConnection(db_instance) as conn:
-            conns.append(id(conn))
+    # Verify by holding max_conn connections at once
+    with ExitStack() as stack:
+        conns = [stack.enter_context(ManagedConnection(db_instance)) for _ in range(pool_size)]
+        ids = {id(conn) for conn in conns}
 
-    # All connections should work
-    assert len(conns) == 5
+    # Each concurrently held connection should be distinct
+    assert len(ids) == pool_size
 
 
 def test_managed_connection_releases_on_exception(db_instance):
@@ -238,22 +255,18 @@ def test_managed_connection_releases_on_exception(db_instance):
     assert db_instance._semaphore._value == initial_semaphore_value
 
 
-def test_concurrent_close_pool(db_instance):
+def test_concurrent_close_pool(db_instance, executor):
     """Test thread safety of close_pool()."""
     results = []
 
-    def worker():
+    def worker(_):
         try:
             db_instance.close_pool()
             results.append("success")
         except Exception as e:
             results.append(f"error: {e}")
 
-    threads = [threading.Thread(target=worker) for _ in range(5)]
-    for t in threads:
-        t.start()
-    for t in threads:
-        t.join()
+    list(executor.map(worker, range(5)))
 
     # Should handle concurrent closes gracefully
     assert len(results) == 5
@@ -274,26 +287,20 @@ def test_connection_pool_reuse(db_instance):
     assert conn1_id == conn2_id
 
 
-def test_multiple_threads_with_context_manager(db_instance):
+@pytest.mark.usefixtures("warm_pool")
+def test_multiple_threads_with_context_manager(db_instance, executor):
     """Test ManagedConnection with multiple threads."""
     results = []
 
-    def worker():
+    def worker(_):
         try:
-            with ManagedConnection(db_instance) as conn:
-                cursor = conn.cursor()
+            with ManagedConnection(db_instance) as conn, conn.cursor() as cursor:
                 cursor.execute("SELECT 1")
-                result = cursor.fetchone()
-                cursor.close()
-                results.append(result[0])
+                results.append(cursor.fetchone()[0])
         except Exception as e:
             results.append(f"error: {e}")
 
-    threads = [threading.Thread(target=worker) for _ in range(10)]
-    for t in threads:
-        t.start()
-    for t in threads:
-        t.join()
+    list(executor.map(worker, range(10)))
 
     # All threads should succeed
     assert len(results) == 10
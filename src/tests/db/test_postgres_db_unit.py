@@ -0,0 +1,9 @@
+import pytest
+from db.postgres_db import PostgresDB
+
+
+def test_get_instance_before_initialization(monkeypatch):
+    """Test that get_instance() raises error when not initialized."""
+    monkeypatch.setattr(PostgresDB, "_instance", None)
+    with pytest.raises(ValueError, match="PostgresDB not initialized"):
+        PostgresDB.get_instance()
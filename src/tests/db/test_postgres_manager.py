@@ -0,0 +1,62 @@
+import psycopg2
+import pytest
+from sqlalchemy import Integer, bindparam, column, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from db.postgres_manager import PostgresManager
+from db.query_types import QueryReturnType, QueryType
+
+
+# Fixtures
+
+
+@pytest.fixture
+def manager(engine, logger):
+    return PostgresManager(engine=engine, logger=logger)
+
+
+@pytest.fixture
+def count_above_query():
+    """Parameterised query with an array param and an untyped param, declared as `unknown` when prepared."""
+    return QueryType(
+        name="count_above_query",
+        sql=(
+            text("SELECT count(*) FROM unnest(:ids) AS id WHERE id > :floor")
+            .bindparams(bindparam("ids", type_=ARRAY(Integer)), bindparam("floor"))
+            .columns(column("count"))
+        ),
+        return_type=QueryReturnType.SCALAR
+    )
+
+# Tests
+
+
+def test_execute_read_prepares_once_per_connection(manager, pg_conn, count_above_query):
+    """Test that a repeated parameterised read is prepared on its first run and executed after."""
+    assert manager.execute_read(count_above_query, pg_conn, {"ids": [1, 2, 3], "floor": 1}) == 2
+    assert manager.execute_read(count_above_query, pg_conn, {"ids": [4, 5, 6, 7], "floor": 4}) == 3
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_prepared_statements WHERE name = %s",
+            (count_above_query.prepared.name,)
+        )
+        assert cursor.fetchone()[0] == 1
+
+
+def test_execute_read_prepares_on_each_connection(manager, pg_conn, db_config, count_above_query):
+    """Test that a statement prepared on one connection is prepared again on another."""
+    assert manager.execute_read(count_above_query, pg_conn, {"ids": [1, 2], "floor": 0}) == 2
+    other_conn = psycopg2.connect(**db_config)
+    try:
+        assert manager.execute_read(count_above_query, other_conn, {"ids": [1, 2], "floor": 1}) == 1
+    finally:
+        other_conn.close()
+
+
+def test_execute_read_shares_prepared_statements_between_managers(engine, logger, pg_conn, count_above_query):
+    """Test that a second manager reuses a statement another manager prepared on the same connection."""
+    first = PostgresManager(engine=engine, logger=logger)
+    second = PostgresManager(engine=engine, logger=logger)
+
+    assert first.execute_read(count_above_query, pg_conn, {"ids": [1, 2, 3], "floor": 1}) == 2
+    assert second.execute_read(count_above_query, pg_conn, {"ids": [1, 2, 3], "floor": 2}) == 1
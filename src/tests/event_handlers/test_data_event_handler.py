@@ -0,0 +1,149 @@
+from threading import Event
+import pytest
+from watchdog.events import DirCreatedEvent, FileCreatedEvent
+from db.database_interface import IDatabase
+from event_handlers.data_event_handler import DataEventHandler
+
+
+class StubConnection:
+    def __init__(self):
+        self.closed = 0
+
+
+class StubDatabase(IDatabase):
+    """Hands out a new connection per checkout and records checkouts and releases."""
+    def __init__(self):
+        self.connections = []
+        self.released = []
+
+    def get_connection(self):
+        self.connections.append(StubConnection())
+        return self.connections[-1]
+
+    def release_connection(self, conn):
+        self.released.append(conn)
+
+    def close_pool(self):
+        pass
+
+
+class StubProcessor:
+    """Records each batch and its connection, optionally closing the connection or waiting on `release`."""
+    def __init__(self, close_connection=False):
+        self.batches = []
+        self.connections = []
+        self.close_connection = close_connection
+        self.started = Event()
+        self.release = Event()
+        self.release.set()
+
+    def process_batch(self, csv_files, conn):
+        self.batches.append(csv_files)
+        self.connections.append(conn)
+        self.started.set()
+        self.release.wait()
+        if self.close_connection:
+            conn.closed = 1
+
+
+# Fixtures
+
+
+@pytest.fixture
+def db():
+    return StubDatabase()
+
+
+@pytest.fixture
+def processor():
+    return StubProcessor()
+
+
+def created(path):
+    return FileCreatedEvent(str(path))
+
+# Tests
+
+
+def test_files_within_batch_window_are_processed_together(processor, db, logger):
+    """Test that files arriving within the batch window are handed to the processor as one batch."""
+    handler = DataEventHandler(processor, db, ["*.csv"], logger, batch_window=5)
+    for name in ("a.csv", "b.csv", "c.csv"):
+        handler.dispatch(created(f"/data/{name}"))
+    handler.stop()
+
+    assert processor.batches == [["/data/a.csv", "/data/b.csv", "/data/c.csv"]]
+    assert db.released == db.connections
+
+
+def test_batches_are_split_at_max_batch_files(processor, db, logger):
+    """Test that a batch is closed once it holds max_batch_files files and the worker keeps its connection."""
+    handler = DataEventHandler(processor, db, ["*.csv"], logger, batch_window=5, max_batch_files=2)
+    for name in ("a", "b", "c", "d", "e"):
+        handler.dispatch(created(f"/data/{name}.csv"))
+    handler.stop()
+
+    assert processor.batches == [["/data/a.csv", "/data/b.csv"], ["/data/c.csv", "/data/d.csv"], ["/data/e.csv"]]
+    assert len(db.connections) == 1
+
+
+def test_full_queue_drops_files_and_rescan_loads_them(processor, db, logger, tmp_path):
+    """Test that a file dropped on a full queue is picked up again by a rescan of the watch directory."""
+    paths = [tmp_path / name for name in ("a.csv", "b.csv", "c.csv")]
+    for path in paths:
+        path.write_text("id\n1\n")
+    (tmp_path / "notes.txt").write_text("")
+    processor.release.clear()
+    handler = DataEventHandler(processor, db, ["*.csv"], logger, batch_window=0, max_pending=1,
+                               watch_directory=str(tmp_path))
+
+    handler.dispatch(created(paths[0]))
+    assert processor.started.wait(5)
+    handler.dispatch(created(paths[1]))
+    handler.dispatch(created(paths[2]))
+    assert handler.dropped_files == 1
+
+    processor.release.set()
+    handler.stop()
+
+    assert processor.batches[:2] == [[str(paths[0])], [str(paths[1])]]
+    assert sorted(processor.batches[2]) == [str(path) for path in paths]
+    assert len(processor.batches) == 3
+
+
+def test_closed_connection_is_replaced(db, logger):
+    """Test that a worker releases a connection closed while processing and checks out a new one."""
+    processor = StubProcessor(close_connection=True)
+    processor.release.clear()
+    handler = DataEventHandler(processor, db, ["*.csv"], logger, batch_window=0)
+
+    handler.dispatch(created("/data/a.csv"))
+    assert processor.started.wait(5)
+    handler.dispatch(created("/data/b.csv"))
+    processor.release.set()
+    handler.stop()
+
+    assert processor.batches == [["/data/a.csv"], ["/data/b.csv"]]
+    assert len(db.connections) == 2
+    assert processor.connections == db.connections
+    assert db.released == db.connections
+
+
+def test_dispatch_filters_directories_and_non_matching_names(processor, db, logger):
+    """Test that directory events and files not matching the patterns are not queued."""
+    handler = DataEventHandler(processor, db, ["*.csv"], logger, workers=0)
+
+    handler.dispatch(DirCreatedEvent("/data/archive.csv"))
+    handler.dispatch(created("/data/orders.json"))
+    handler.dispatch(created("/data.csv/orders"))
+
+    assert handler._queue.qsize() == 0
+
+
+def test_dispatch_matches_patterns_case_insensitively(processor, db, logger):
+    """Test that ORDERS.CSV matches *.csv, like watchdog's default case-insensitive matching."""
+    handler = DataEventHandler(processor, db, ["*.csv"], logger, workers=0)
+
+    handler.dispatch(created("/data/ORDERS.CSV"))
+
+    assert handler._queue.get_nowait() == "/data/ORDERS.CSV"
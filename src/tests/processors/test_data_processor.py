@@ -0,0 +1,153 @@
+from unittest.mock import MagicMock
+import pytest
+from sqlalchemy import text
+from db.postgres_manager import PostgresManager
+from processors import data_processor
+from processors.config_factory import create_customer_config
+from processors.data_processor import PostgresDataProcessor
+
+ALICE = "f47ac10b-58cc-4372-a567-0e02b2c3d479"
+BOB = "5aebd9d1-8d9e-44ec-b0c3-8c6a1f8bf1ae"
+HEADER = "customer_id,first_name,last_name,email\n"
+
+
+# Fixtures
+
+
+@pytest.fixture
+def processor(engine, logger):
+    """Customer processor on freshly created tables, dropped again after the test."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw"))
+    config = create_customer_config()
+    manager = PostgresManager(engine=engine, logger=logger)
+    manager.create_table(config.target_table.metadata)
+    processor = PostgresDataProcessor(config, manager, logger)
+    processor.set_up_tables()
+    yield processor
+    for metadata in (config.tmp_metadata, config.manifest_metadata, config.target_table.metadata):
+        manager.drop_table(metadata)
+
+
+def write_csv(path, *rows):
+    path.write_text(HEADER + "".join(f"{row}\n" for row in rows))
+    return str(path)
+
+
+def fetch_emails(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT customer_id::text, email FROM raw.customer")
+        return dict(cursor.fetchall())
+
+
+def count_manifest_rows(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM raw.customer_manifest")
+        return cursor.fetchone()[0]
+
+# Tests
+
+
+def test_process_batch_merges_and_records_manifest(processor, pg_conn, tmp_path):
+    """Test that a batch is copied, merged into the target table and recorded once in the manifest."""
+    customers = write_csv(
+        tmp_path / "customers.csv",
+        f"{ALICE},Alice,Johnson,alice@example.com",
+        f"{BOB},Bob,Smith,bob@example.com",
+    )
+
+    processor.process_batch([customers], pg_conn)
+    # The same file again is skipped by its digest
+    processor.process_batch([customers], pg_conn)
+
+    assert fetch_emails(pg_conn) == {ALICE: "alice@example.com", BOB: "bob@example.com"}
+    assert count_manifest_rows(pg_conn) == 1
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM raw.tmp_customer")
+        assert cursor.fetchone()[0] == 0
+
+
+def test_process_batch_newer_file_updates_rows(processor, pg_conn, tmp_path):
+    """Test that a later batch updates rows merged by an earlier one."""
+    customers = write_csv(tmp_path / "customers.csv", f"{ALICE},Alice,Johnson,alice@example.com")
+    update = write_csv(tmp_path / "customers_update.csv", f"{ALICE},Alice,Johnson,alice@new.example.com")
+
+    processor.process_batch([customers], pg_conn)
+    processor.process_batch([update], pg_conn)
+
+    assert fetch_emails(pg_conn) == {ALICE: "alice@new.example.com"}
+    assert count_manifest_rows(pg_conn) == 2
+
+
+def test_process_batch_with_overlapping_keys_loads_files_in_order(processor, pg_conn, tmp_path):
+    """Test that files of one batch sharing a primary key are all loaded, the later file winning."""
+    customers = write_csv(
+        tmp_path / "customers.csv",
+        f"{ALICE},Alice,Johnson,alice@example.com",
+        f"{BOB},Bob,Smith,bob@example.com",
+    )
+    update = write_csv(tmp_path / "customers_update.csv", f"{ALICE},Alice,Johnson,alice@new.example.com")
+
+    processor.process_batch([customers, update], pg_conn)
+
+    assert fetch_emails(pg_conn) == {ALICE: "alice@new.example.com", BOB: "bob@example.com"}
+    assert count_manifest_rows(pg_conn) == 2
+
+
+def test_process_batch_skips_unreadable_files(processor, pg_conn, tmp_path):
+    """Test that a file missing by the time its batch runs does not stop the rest of the batch."""
+    customers = write_csv(tmp_path / "customers.csv", f"{ALICE},Alice,Johnson,alice@example.com")
+
+    processor.process_batch([str(tmp_path / "missing.csv"), customers], pg_conn)
+
+    assert fetch_emails(pg_conn) == {ALICE: "alice@example.com"}
+    assert count_manifest_rows(pg_conn) == 1
+
+
+def test_insert_to_table_rows_and_row(processor, pg_conn):
+    """Test that a list of rows is inserted with execute_values and a single row as one INSERT, both uncommitted."""
+    manifest_table = processor.config.manifest_table
+    rows = [
+        {"file_name": "customers", "digest": "a" * 32, "file_size": 10, "processed_at": 1},
+        {"file_name": "customers_update", "digest": "b" * 32, "file_size": 20, "processed_at": 2},
+    ]
+
+    processor.insert_to_table(manifest_table, rows, pg_conn)
+    processor.insert_to_table(manifest_table, {"file_name": "more", "digest": "c" * 32, "file_size": 30,
+                                               "processed_at": 3}, pg_conn)
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT file_name, file_size FROM raw.customer_manifest ORDER BY digest")
+        assert cursor.fetchall() == [("customers", 10), ("customers_update", 20), ("more", 30)]
+    pg_conn.rollback()
+    assert count_manifest_rows(pg_conn) == 0
+
+
+def test_set_up_tables_converts_logged_tmp_table(processor, pg_conn):
+    """Test that a temporary table left logged by an earlier version is made UNLOGGED at start-up."""
+    with pg_conn.cursor() as cursor:
+        cursor.execute("ALTER TABLE raw.tmp_customer SET LOGGED")
+    pg_conn.commit()
+
+    processor.set_up_tables()
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT relpersistence FROM pg_class WHERE oid = 'raw.tmp_customer'::regclass")
+        assert cursor.fetchone()[0] == "u"
+
+
+def test_seen_digests_are_bounded_and_expire(monkeypatch):
+    """Test that remembered manifest digests are capped, oldest first, and forgotten after the TTL."""
+    now = [1000.0]
+    monkeypatch.setattr(data_processor, "monotonic", lambda: now[0])
+    monkeypatch.setattr(data_processor, "SEEN_DIGESTS_MAX", 2)
+    monkeypatch.setattr(data_processor, "SEEN_DIGESTS_TTL", 10)
+    processor = PostgresDataProcessor(create_customer_config(), MagicMock(), MagicMock())
+
+    processor._remember_digests(["a", "b"])
+    now[0] += 5
+    processor._remember_digests(["c"])
+    assert processor._get_seen_digests(["a", "b", "c"]) == {"b", "c"}
+
+    now[0] += 6
+    assert processor._get_seen_digests(["a", "b", "c"]) == {"c"}
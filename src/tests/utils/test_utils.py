@@ -0,0 +1,67 @@
+import os
+import pytest
+import xxhash
+from utils.utils import DIGEST_XATTR, extract_file_name, get_cached_fingerprint, get_content_fingerprint
+
+
+# Fixtures
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Path of a file on a file system supporting user extended attributes."""
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    try:
+        os.setxattr(path, "user.test", b"")
+    except (AttributeError, OSError):
+        pytest.skip("user extended attributes are not supported here")
+    return path
+
+
+# Tests
+
+
+@pytest.mark.parametrize("size", [0, 10, (1 << 20) + 7])
+def test_get_content_fingerprint_matches_xxhash(tmp_path, size):
+    """Test that the chunked fingerprint matches xxh3_128 of the whole content for empty, small and multi-chunk files."""
+    content = bytes(range(256)) * (size // 256) + bytes(size % 256)
+    path = tmp_path / "data.csv"
+    path.write_bytes(content)
+
+    assert get_content_fingerprint(str(path)) == xxhash.xxh3_128(content).hexdigest()
+
+
+def test_extract_file_name():
+    """Test that the file name is extracted without its directory or extension, spaces replaced."""
+    assert extract_file_name("landing/orders/daily orders.csv") == "daily_orders"
+
+
+def test_get_cached_fingerprint_reuses_stored_fingerprint(csv_path):
+    """Test that the fingerprint stored for the file's current mtime and size is returned without hashing."""
+    assert get_cached_fingerprint(str(csv_path)) == get_content_fingerprint(str(csv_path))
+
+    stamp, _, _ = os.getxattr(csv_path, DIGEST_XATTR).decode().rpartition(":")
+    os.setxattr(csv_path, DIGEST_XATTR, f"{stamp}:cached".encode())
+
+    assert get_cached_fingerprint(str(csv_path)) == "cached"
+
+
+def test_get_cached_fingerprint_invalidated_by_mtime(csv_path):
+    """Test that a stored fingerprint is ignored once the file's mtime changes, even at the same size."""
+    get_cached_fingerprint(str(csv_path))
+    mtime_ns = csv_path.stat().st_mtime_ns
+    csv_path.write_bytes(b"a,b\n3,4\n")
+    os.utime(csv_path, ns=(mtime_ns + 1_000_000_000, mtime_ns + 1_000_000_000))
+
+    assert get_cached_fingerprint(str(csv_path)) == get_content_fingerprint(str(csv_path))
+
+
+def test_get_cached_fingerprint_invalidated_by_size(csv_path):
+    """Test that a stored fingerprint is ignored once the file's size changes, even at the same mtime."""
+    get_cached_fingerprint(str(csv_path))
+    stat = csv_path.stat()
+    csv_path.write_bytes(b"a,b\n1,2\n3,4\n")
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert get_cached_fingerprint(str(csv_path)) == get_content_fingerprint(str(csv_path))
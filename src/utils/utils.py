@@ -1,21 +1,67 @@
-import hashlib
 import os
+from functools import lru_cache
+from typing import Optional
+import xxhash
 
+HASH_CHUNK_SIZE = 1 << 20
+# Extended attribute caching a file's content fingerprint
+DIGEST_XATTR = "user.xxh3_128"
 
-def get_md5(file_path: str):
+
+def get_content_fingerprint(file_path: str):
     """
-    Computes the MD5 hash of a file.
+    Computes the xxHash3 128-bit fingerprint of a file's contents.
+
+    The fingerprint identifies files for deduplication only and is not used cryptographically,
+    so the much faster non-cryptographic xxHash3 is used instead of MD5. The file is read in
+    1 MiB chunks so that large files are hashed with few read calls. Every chunk is read into
+    the same buffer, so hashing allocates no memory per chunk.
     """
-    hash = hashlib.md5()
-    with open(file_path, 'rb') as file:
-        while chunk := file.read(4096):
-            hash.update(chunk)
+    hash = xxhash.xxh3_128()
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, 'rb', buffering=0) as file:
+        while size := file.readinto(buffer):
+            hash.update(view[:size])
     return hash.hexdigest()
 
 
+def get_cached_fingerprint(file_path: str, stat: Optional[os.stat_result] = None):
+    """
+    Returns the content fingerprint of a file, reusing the one stored on the file when it is still valid.
+
+    The fingerprint is kept in a `user.xxh3_128` extended attribute together with the file's
+    modification time and size, so files already fingerprinted before a restart are not read
+    again. The stored fingerprint is ignored once the file has changed. On platforms or file
+    systems without extended attribute support the file is simply hashed. A `stat` result the
+    caller already holds for the file can be passed to avoid another stat call.
+    """
+    if not hasattr(os, "getxattr"):
+        return get_content_fingerprint(file_path)
+
+    if stat is None:
+        stat = os.stat(file_path)
+    stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+    try:
+        cached_stamp, _, digest = os.getxattr(file_path, DIGEST_XATTR).decode().rpartition(":")
+        if cached_stamp == stamp:
+            return digest
+    except OSError:
+        pass
+
+    digest = get_content_fingerprint(file_path)
+    try:
+        os.setxattr(file_path, DIGEST_XATTR, f"{stamp}:{digest}".encode())
+    except OSError:
+        pass
+    return digest
+
+
+@lru_cache(maxsize=4096)
 def extract_file_name(csv_file: str):
     """
     Extracts the file name without the extension from a given file path.
+
+    The result depends only on the path, so it is cached for paths seen again during a run.
     """
-    file_name_ext = (csv_file.split('/')[-1]).replace(" ", "_")
-    return os.path.splitext(file_name_ext)[0]
+    return os.path.splitext(os.path.basename(csv_file))[0].replace(" ", "_")